@@ -0,0 +1,85 @@
+"""Measure cold import time of the entry points against regression budgets.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--ui] [--json FILE]
+
+Each module is imported in a fresh interpreter so nothing is cached in
+sys.modules; the best of ``--runs`` is compared with its budget. Exits 1 if
+any module is over budget, so it can run in CI.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Budgets in milliseconds. None of these may pull in numpy, cryptography,
+# reportlab or Qt at import time; those load when first used.
+BUDGETS_MS = {
+    "src.wipe_history": 60,
+    "src.reports": 60,
+    "src.jobs": 100,
+    "src.cli": 120,
+}
+
+# The GUI imports PySide6 up front, so its budget is mostly Qt itself.
+UI_BUDGETS_MS = {
+    "main": 700,
+}
+
+HEAVY_MODULES = ("numpy", "cryptography", "reportlab", "PySide6", "pytz")
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, cwd, runs):
+    env = dict(os.environ, PYTHONPATH=ROOT, QT_QPA_PLATFORM="offscreen")
+    best = None
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=cwd, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        sample = json.loads(out.strip().splitlines()[-1])
+        if best is None or sample["ms"] < best["ms"]:
+            best = sample
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ui", action="store_true", help="also measure the Qt window module")
+    parser.add_argument("--json", help="write results here")
+    args = parser.parse_args()
+
+    suites = [(BUDGETS_MS, ROOT)]
+    if args.ui:
+        suites.append((UI_BUDGETS_MS, os.path.join(ROOT, "ui")))
+
+    results = []
+    for budgets, cwd in suites:
+        for module, budget in budgets.items():
+            sample = measure(module, cwd, args.runs)
+            ok = sample["ms"] <= budget
+            results.append({"module": module, "ms": round(sample["ms"], 1), "budget_ms": budget,
+                            "ok": ok, "heavy_imports": sample["heavy"]})
+            heavy = f" loads {', '.join(sample['heavy'])}" if sample["heavy"] else ""
+            print(f"{module:<18} {sample['ms']:7.1f} ms  budget {budget:4d} ms  "
+                  f"{'ok' if ok else 'OVER'}{heavy}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
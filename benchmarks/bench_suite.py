@@ -0,0 +1,282 @@
+"""Benchmark the wipe, hash, report and history paths and write JSON results.
+
+Usage: python benchmarks/bench_suite.py [--quick] [--dir DIR] [--json FILE]
+                                        [--baseline FILE] [--tolerance 0.15]
+
+Everything runs on files created under ``--dir`` (a temp directory by
+default; use one on the disk you care about, /tmp may be tmpfs). The block
+engine runs on a sparse image file, the same code path a loop device takes.
+With ``--baseline`` the run is compared against an earlier JSON result and
+the exit status is 1 if any case lost more than ``--tolerance`` of its
+throughput.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+import tempfile
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from src import reports
+from src.block_wipe import overwrite_target
+from src.wipe_history import WipeHistory
+from src.wipe_utils import hash_and_wipe_file, wipe_file
+
+MiB = 1024 * 1024
+
+FULL = {
+    "wipe_sizes_mb": (1, 16, 128),
+    "wipe_passes": (1, 3),
+    "image_size_mb": 256,
+    "hash_sizes_mb": (1, 16, 128),
+    "reports": 50,
+    "history_sizes": (1000, 10000, 100000, 1000000),
+    "lookups": 1000,
+}
+
+QUICK = {
+    "wipe_sizes_mb": (1, 16),
+    "wipe_passes": (1, 3),
+    "image_size_mb": 32,
+    "hash_sizes_mb": (1, 16),
+    "reports": 10,
+    "history_sizes": (1000, 10000),
+    "lookups": 200,
+}
+
+
+def make_file(path, size):
+    # Fixed content so every run writes and hashes the same bytes.
+    block = hashlib.sha256(b"bench").digest() * (MiB // 32)
+    with open(path, "wb") as f:
+        for _ in range(size // MiB):
+            f.write(block)
+        f.write(block[:size % MiB])
+    return path
+
+
+def fake_hash(i):
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def result(name, params, seconds, nbytes=None, ops=None):
+    entry = {"name": name, "params": params, "seconds": round(seconds, 6)}
+    if nbytes is not None:
+        entry["bytes"] = nbytes
+        entry["throughput_mb_s"] = round(nbytes / seconds / 1e6, 1) if seconds else None
+    if ops is not None:
+        entry["ops"] = ops
+        entry["ops_per_s"] = round(ops / seconds, 1) if seconds else None
+    print(f"{name:<22} {json.dumps(params):<44} {seconds:9.3f}s"
+          + (f" {entry['throughput_mb_s']:9.1f} MB/s" if nbytes is not None else "")
+          + (f" {entry['ops_per_s']:10.1f} op/s" if ops is not None else ""))
+    return entry
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    return time.perf_counter() - start, value
+
+
+def bench_wipe_file(directory, config):
+    results = []
+    for size_mb in config["wipe_sizes_mb"]:
+        for passes in config["wipe_passes"]:
+            path = make_file(os.path.join(directory, "wipe.bin"), size_mb * MiB)
+            seconds, ok = timed(wipe_file, path, passes=passes)
+            # passes random overwrites plus the final zero pass
+            results.append(result("wipe_file", {"size_mb": size_mb, "passes": passes, "ok": ok},
+                                  seconds, nbytes=size_mb * MiB * (passes + 1)))
+        path = make_file(os.path.join(directory, "wipe.bin"), size_mb * MiB)
+        seconds, _ = timed(hash_and_wipe_file, path, passes=1)
+        results.append(result("hash_and_wipe_file", {"size_mb": size_mb, "passes": 1},
+                              seconds, nbytes=size_mb * MiB * 2))
+    return results
+
+
+def bench_block_image(directory, config):
+    size = config["image_size_mb"] * MiB
+    path = os.path.join(directory, "disk.img")
+    with open(path, "wb") as f:
+        f.truncate(size)
+    results = []
+    for direct in (False, True):
+        seconds, stats = timed(overwrite_target, path, passes=("random", "zero"), direct=direct)
+        results.append(result("block_image", {"size_mb": config["image_size_mb"], "passes": 2,
+                                              "direct": stats["direct"]},
+                              seconds, nbytes=size * 2))
+    os.remove(path)
+    return results
+
+
+def bench_hash(directory, config):
+    sys.path.append(os.path.join(ROOT, "ui"))
+    try:
+        from home_page import HomePage
+    except ImportError as e:
+        print(f"[bench] Skipping compute_file_hash: {e}")
+        return []
+    results = []
+    for size_mb in config["hash_sizes_mb"]:
+        path = make_file(os.path.join(directory, "hash.bin"), size_mb * MiB)
+        seconds, _ = timed(HomePage.compute_file_hash, None, path)
+        results.append(result("compute_file_hash", {"size_mb": size_mb}, seconds, nbytes=size_mb * MiB))
+        os.remove(path)
+    return results
+
+
+def generate_keys(directory):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+    keys = {}
+    for name, key in (("rsa-pss-sha256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+                      ("ed25519", ed25519.Ed25519PrivateKey.generate())):
+        path = os.path.join(directory, f"{name}.pem")
+        with open(path, "wb") as f:
+            f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                      serialization.NoEncryption()))
+        keys[name] = path
+    return keys
+
+
+def bench_reports(directory, config):
+    reports.REPORTS_DIR = os.path.join(directory, "reports")
+    count = config["reports"]
+    results = []
+    for algorithm, key_path in generate_keys(directory).items():
+        reports.load_private_key(key_path)  # parse once, as a long-running process would
+        data = [reports.build_report_data(f"file_{i}.bin", fake_hash(i)) for i in range(count)]
+        seconds, _ = timed(lambda: [reports.sign_report(d, key_path) for d in data])
+        results.append(result("report_sign", {"algorithm": algorithm}, seconds, ops=count))
+        seconds, _ = timed(lambda: [reports.write_json_report(d) for d in data])
+        results.append(result("report_json", {"algorithm": algorithm}, seconds, ops=count))
+        seconds, _ = timed(lambda: [reports.generate_report(f"file_{i}.bin", fake_hash(i), key_path, None)
+                                    for i in range(count)])
+        results.append(result("generate_report", {"algorithm": algorithm}, seconds, ops=count))
+    seconds, _ = timed(lambda: [reports.write_pdf_report(d) for d in data])
+    results.append(result("report_pdf", {}, seconds, ops=count))
+    return results
+
+
+def bench_history(directory, config):
+    results = []
+    lookups = config["lookups"]
+    for size in config["history_sizes"]:
+        db_path = os.path.join(directory, f"history_{size}.db")
+        history = WipeHistory(db_path, legacy_path=None)
+        records = ({"file_name": f"file_{i}.bin", "file_hash": fake_hash(i),
+                    "deleted_at": f"2025-01-01T00:00:{i % 60:02d}.{i:06d}Z"} for i in range(size))
+        start = time.perf_counter()
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == 10000:
+                history.extend(batch)
+                batch = []
+        history.extend(batch)
+        results.append(result("history_bulk_load", {"records": size}, time.perf_counter() - start, ops=size))
+
+        seconds, _ = timed(lambda: [history.append({"file_name": "new.bin", "file_hash": fake_hash(-i),
+                                                    "deleted_at": "2025-06-01T00:00:00Z"})
+                                    for i in range(1, lookups + 1)])
+        results.append(result("save_wipe_record", {"records": size}, seconds, ops=lookups))
+
+        step = max(size // lookups, 1)
+        seconds, found = timed(lambda: sum(bool(history.find_by_hash(fake_hash(i)))
+                                           for i in range(0, size, step)))
+        results.append(result("verify_hash_hit", {"records": size, "found": found},
+                              seconds, ops=len(range(0, size, step))))
+        seconds, _ = timed(lambda: [history.find_by_hash("0" * 63 + str(i % 10)) for i in range(lookups)])
+        results.append(result("verify_hash_miss", {"records": size}, seconds, ops=lookups))
+        history.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def case_key(entry):
+    params = {k: v for k, v in entry["params"].items() if k not in ("ok", "found", "direct")}
+    return entry["name"], json.dumps(params, sort_keys=True)
+
+
+def compare(results, baseline, tolerance):
+    """Return the cases whose throughput dropped by more than ``tolerance``."""
+    previous = {case_key(entry): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        old = previous.get(case_key(entry))
+        if not old:
+            continue
+        metric = "throughput_mb_s" if "throughput_mb_s" in entry else "ops_per_s"
+        if old.get(metric) and entry.get(metric) is not None and entry[metric] < old[metric] * (1 - tolerance):
+            regressions.append({"name": entry["name"], "params": entry["params"], "metric": metric,
+                                "baseline": old[metric], "current": entry[metric]})
+    return regressions
+
+
+BENCHES = {
+    "wipe": bench_wipe_file,
+    "block": bench_block_image,
+    "hash": bench_hash,
+    "reports": bench_reports,
+    "history": bench_history,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHES), help="run only these groups")
+    parser.add_argument("--dir", help="directory for the benchmark files (default: a temp dir)")
+    parser.add_argument("--json", help="write results here")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed throughput loss (fraction)")
+    args = parser.parse_args()
+
+    config = QUICK if args.quick else FULL
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for name, bench in BENCHES.items():
+            if not args.only or name in args.only:
+                results.extend(bench(directory, config))
+
+    output = {"meta": metadata(), "config": config, "results": results}
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            output["regressions"] = compare(results, json.load(f), args.tolerance)
+        for reg in output["regressions"]:
+            print(f"REGRESSION {reg['name']} {json.dumps(reg['params'])}: "
+                  f"{reg['baseline']} -> {reg['current']} {reg['metric']}")
+        status = 1 if output["regressions"] else 0
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
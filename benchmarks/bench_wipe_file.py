@@ -0,0 +1,71 @@
+"""Compare the streaming wipe_file against the old whole-file-in-memory version.
+
+Usage: python benchmarks/bench_wipe_file.py [size_mb] [chunk_kb]
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.wipe_utils import wipe_file
+
+
+def legacy_wipe_file(file_path, passes=3):
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "r+b") as f:
+        for p in range(passes):
+            f.seek(0)
+            f.write(os.urandom(file_size))
+            f.flush()
+            os.fsync(f.fileno())
+    with open(file_path, "r+b") as f:
+        f.seek(0)
+        f.write(b"\x00" * file_size)
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(file_path)
+    return True
+
+
+def make_file(directory, size):
+    path = os.path.join(directory, "target.bin")
+    with open(path, "wb") as f:
+        block = b"\xa5" * (1024 * 1024)
+        for _ in range(size // len(block)):
+            f.write(block)
+        f.write(block[:size % len(block)])
+    return path
+
+
+def measure(label, func, directory, size):
+    path = make_file(directory, size)
+    tracemalloc.start()
+    start = time.perf_counter()
+    ok = func(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # 3 random passes + 1 zero pass
+    mb_per_s = 4 * size / elapsed / 1e6
+    print(f"{label:<10} ok={ok} time={elapsed:7.2f}s throughput={mb_per_s:8.1f} MB/s "
+          f"peak_py_mem={peak / 1e6:8.1f} MB")
+    return elapsed
+
+
+def main():
+    size = int(sys.argv[1]) * 1024 * 1024 if len(sys.argv) > 1 else 256 * 1024 * 1024
+    chunk = int(sys.argv[2]) * 1024 if len(sys.argv) > 2 else None
+    with tempfile.TemporaryDirectory() as directory:
+        old = measure("legacy", legacy_wipe_file, directory, size)
+        if chunk:
+            new = measure("streaming", lambda p: wipe_file(p, chunk_size=chunk), directory, size)
+        else:
+            new = measure("streaming", wipe_file, directory, size)
+    print(f"speedup: {old / new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
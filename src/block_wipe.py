@@ -0,0 +1,228 @@
+import os
+import time
+import errno
+
+from src.checkpoint import target_identity
+from src.metrics import WipeMetrics
+from src.offload import discard_extents, is_block_device, zero_extents
+from src.methods import NIST_CLEAR_PASSES, pattern_for
+from src.overwrite import DEFAULT_CHUNK_SIZE, Overwriter
+from src.striped import DEFAULT_STRIPE_SIZE, striped_pass
+
+DEFAULT_BLOCK_SIZE = DEFAULT_CHUNK_SIZE
+DEFAULT_SYNC_INTERVAL = 256 * 1024 * 1024
+DIRECT_IO_ALIGNMENT = 4096
+
+_OPEN_FLAGS = os.O_RDWR | getattr(os, "O_BINARY", 0) | getattr(os, "O_CLOEXEC", 0)
+
+
+def open_target(path, direct=False):
+    """Open a block device or image file for writing.
+
+    Returns ``(fd, direct)``; ``direct`` is False if O_DIRECT was requested but
+    the platform or filesystem (e.g. tmpfs) does not support it.
+    """
+    if direct and hasattr(os, "O_DIRECT"):
+        try:
+            return os.open(path, _OPEN_FLAGS | os.O_DIRECT), True
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+            print(f"[block_wipe] O_DIRECT not supported for {path}, using buffered I/O")
+    elif direct:
+        print("[block_wipe] O_DIRECT not available on this platform, using buffered I/O")
+    return os.open(path, _OPEN_FLAGS), False
+
+
+def refuse_in_use(target, metrics=None):
+    """Raise ValueError if the inventory refuses to wipe the disk behind ``target``."""
+    # Imported here: inventory itself depends on this module.
+    from src.inventory import check_target
+    refused = check_target(target)
+    if refused:
+        error = ValueError(f"Refusing to wipe: {refused}")
+        if metrics is not None:
+            metrics.error(error)
+        raise error
+
+
+def target_size(fd):
+    # Works for regular files and block devices alike.
+    return os.lseek(fd, 0, os.SEEK_END)
+
+
+def _pass_pattern(name, idx, journal):
+    pattern = pattern_for(name)
+    # Keyed patterns reuse the journalled key so a resumed pass continues
+    # the same stream (and can still be verified end to end).
+    if journal is not None and hasattr(pattern, "key"):
+        saved = journal.pattern_key(idx)
+        if saved:
+            pattern = type(pattern)(*saved)
+        else:
+            journal.set_pattern_key(idx, pattern.key, pattern.nonce)
+    return pattern
+
+
+def overwrite_target(target, passes=NIST_CLEAR_PASSES, block_size=DEFAULT_BLOCK_SIZE,
+                     direct=False, sync_interval=DEFAULT_SYNC_INTERVAL, progress=None,
+                     verify=False, metrics=None, offload=True, discard=False, journal=None,
+                     queue_depth=1, stripe_size=DEFAULT_STRIPE_SIZE):
+    """Overwrite a whole device or image file in-process, one pass per pattern spec
+    (see methods.pattern_for).
+
+    ``progress(pass_index, bytes_done, total_bytes)`` is called after every block.
+    With ``verify`` set, the final pass reads each window back right after
+    writing it and the mismatching byte ranges are recorded under
+    ``"verification"``.
+    Pass timings, fsync latencies and retries are recorded on ``metrics`` (a
+    new WipeMetrics if not given) and included under ``"metrics"``.
+    With ``offload``, zero passes are handed to the kernel (BLKZEROOUT, or
+    fallocate for image files) when supported. On image files only a zero
+    pass after an in-place overwrite is offloaded, since fallocate leaves the
+    old blocks' contents on the medium. With ``discard``, the whole
+    target is discarded (secure discard where offered) after the last pass.
+    Each pass records the mechanism that carried it out.
+    With a CheckpointJournal as ``journal``, progress is checkpointed after
+    every fsync and a wipe of the same target and passes picks up where the
+    journal left off; the history is returned under ``"resumptions"``.
+    A ``queue_depth`` above 1 writes unverified passes as ``stripe_size``
+    stripes with that many writes in flight (see striped.striped_pass), which
+    NVMe drives need to reach their rated bandwidth.
+    Returns a stats dict with the size, I/O settings and per-pass timings.
+    Raises ValueError, before opening it, for a disk that is mounted, holds
+    the running system or is otherwise in use (see inventory.check_target).
+    """
+    metrics = metrics or WipeMetrics(target, "block")
+    refuse_in_use(target, metrics)
+    try:
+        fd, opened_direct = open_target(target, direct)
+    except OSError as e:
+        metrics.error(e)
+        raise
+    if direct and not opened_direct:
+        metrics.retry("O_DIRECT not supported, reopened with buffered I/O")
+    direct = opened_direct
+    tail_fd = None
+    overwriter = Overwriter(block_size, metrics)
+    stats = {
+        "target": target,
+        "block_size": overwriter.chunk_size,
+        "direct": direct,
+        "queue_depth": queue_depth,
+        "passes": [],
+    }
+    try:
+        size = target_size(fd)
+        stats["size"] = size
+        # O_DIRECT needs aligned lengths; an unaligned tail (image files only)
+        # goes through a second, buffered descriptor.
+        body = size - size % DIRECT_IO_ALIGNMENT if direct else size
+        if body < size:
+            tail_fd = os.open(target, _OPEN_FLAGS)
+
+        start_pass, resume_offset = 0, 0
+        if journal is not None:
+            start_pass, resume_offset = journal.begin(target_identity(target, fd, size), passes,
+                                                      overwriter.chunk_size)
+            # Keep O_DIRECT alignment even if the block size changed between runs.
+            resume_offset = min(resume_offset, body) // DIRECT_IO_ALIGNMENT * DIRECT_IO_ALIGNMENT
+            for resumption in journal.resumptions:
+                metrics.resumed(resumption)
+            if journal.resumptions:
+                print(f"[block_wipe] Resuming {target} at pass {start_pass + 1}, offset {resume_offset}")
+
+        block_device = is_block_device(fd)
+        for idx, name in enumerate(passes):
+            if idx < start_pass:
+                continue
+            offset = resume_offset if idx == start_pass else 0
+            pattern = _pass_pattern(name, idx, journal)
+            report = None
+            if progress:
+                report = lambda done, total, idx=idx, offset=offset: progress(idx, offset + done, size)
+            on_sync = None
+            if journal is not None:
+                on_sync = lambda done, found=None, idx=idx, offset=offset: journal.checkpoint(
+                    idx, offset + done, found)
+            start = time.monotonic()
+            metrics.begin_pass(name)
+            verify_pass = verify and idx == len(passes) - 1
+            mechanism = None
+            # Pass 0 is never offloaded on image files, so idx > 0 means the
+            # data has already been overwritten in place (in this run or before
+            # the resumption).
+            if offload and pattern.name == "zero" and (block_device or idx > 0):
+                mechanism = zero_extents(fd, [(offset, size)], report)
+            if mechanism:
+                if verify_pass:
+                    from src.verify import check_written
+                    mismatches = check_written(fd, pattern, 0, body, overwriter.chunk_size)
+                    if tail_fd is not None:
+                        mismatches += check_written(tail_fd, pattern, body, size - body)
+            elif verify_pass:
+                # NumPy is only needed (and imported) when verifying
+                from src.verify import verified_pass
+                mismatches = verified_pass(overwriter, fd, pattern, body - offset, offset,
+                                           progress=report, on_sync=on_sync)
+                if tail_fd is not None:
+                    mismatches += verified_pass(overwriter, tail_fd, pattern, size - body, body)
+            else:
+                if queue_depth > 1:
+                    striped_pass(fd, pattern, body - offset, offset, chunk_size=overwriter.chunk_size,
+                                 queue_depth=queue_depth, stripe_size=stripe_size, progress=report,
+                                 sync_interval=sync_interval, on_sync=on_sync, sync=overwriter.sync,
+                                 metrics=overwriter.metrics)
+                else:
+                    overwriter.run_pass(fd, pattern, body - offset, offset, progress=report,
+                                        sync_interval=sync_interval, on_sync=on_sync)
+                if tail_fd is not None:
+                    overwriter.run_pass(tail_fd, pattern, size - body, body)
+                    overwriter.sync(tail_fd)
+            if verify_pass:
+                if journal is not None:
+                    # Windows checked before an interruption are only in the journal.
+                    from src.verify import merge_ranges
+                    mismatches = merge_ranges(journal.mismatches() + mismatches)
+                stats["verification"] = {
+                    "mode": "full",
+                    "pass": idx + 1,
+                    "bytes_checked": size,
+                    "mismatches": mismatches,
+                    "passed": not mismatches,
+                }
+                metrics.verified(stats["verification"])
+            if tail_fd is not None and progress:
+                progress(idx, size, size)
+            overwriter.sync(fd)
+            if journal is not None:
+                journal.checkpoint(idx + 1, 0)
+            metrics.end_pass(size - offset, mechanism or "write")
+            elapsed = time.monotonic() - start
+            stats["passes"].append({
+                "pattern": name,
+                "mechanism": mechanism or "write",
+                "bytes": size - offset,
+                "seconds": round(elapsed, 3),
+            })
+            print(f"[block_wipe] Pass {idx+1} ({name}, {mechanism or 'write'}) complete: "
+                  f"{(size - offset) / max(elapsed, 1e-9) / 1e6:.1f} MB/s")
+        if discard:
+            stats["discard"] = discard_extents(fd, [(0, size)])
+            if stats["discard"]:
+                print(f"[block_wipe] Discarded {target} ({stats['discard']})")
+            else:
+                print(f"[block_wipe] Discard not supported for {target}")
+        if journal is not None:
+            stats["resumptions"] = journal.resumptions
+            journal.finish()
+    except Exception as e:
+        metrics.error(e)
+        raise
+    finally:
+        os.close(fd)
+        if tail_fd is not None:
+            os.close(tail_fd)
+        overwriter.close()
+    stats["metrics"] = metrics.as_dict()
+    return stats
@@ -0,0 +1,147 @@
+import os
+import json
+import stat
+import datetime
+
+from src.sysfs import disk_ids, read_sysfs
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ui'))
+CHECKPOINT_DIR = os.path.join(BASE_DIR, "reports", "checkpoints")
+
+JOURNAL_VERSION = 1
+
+
+def _utcnow():
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+def target_identity(path, fd, size, sysfs_root="/sys"):
+    """Describe the medium behind ``path`` well enough to tell drives apart.
+
+    Block devices are identified by their WWID or serial number from sysfs
+    (device nodes are renumbered across reboots and USB resets), image files
+    by device and inode. The size is always included.
+    """
+    st = os.fstat(fd)
+    identity = {"size": size}
+    if stat.S_ISBLK(st.st_mode):
+        name = os.path.basename(os.path.realpath(path))
+        block = os.path.realpath(os.path.join(sysfs_root, "class", "block", name))
+        # A partition's identifiers live on its parent disk.
+        if os.path.exists(os.path.join(block, "partition")):
+            identity["partition"] = read_sysfs(os.path.join(block, "partition"))
+            block = os.path.dirname(block)
+        identity.update(disk_ids(block))
+        if "wwid" not in identity and "serial" not in identity:
+            identity["path"] = os.path.realpath(path)
+    else:
+        identity["dev"] = st.st_dev
+        identity["inode"] = st.st_ino
+    return identity
+
+
+def journal_path(target, directory=CHECKPOINT_DIR):
+    name = os.path.realpath(target).strip(os.sep).replace(os.sep, "_") or "root"
+    return os.path.join(directory, f"{name}.json")
+
+
+class CheckpointJournal:
+    """Durable record of how far a multi-pass wipe has got.
+
+    The journal holds the target identity, the pass list, the random pattern
+    keys (so an interrupted pass continues the same keystream), the current
+    pass and the last offset known to be fsynced, plus every earlier
+    resumption. It is rewritten atomically (temp file, fsync, rename) so a
+    power cut leaves either the old or the new checkpoint.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = None
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get("version") == JOURNAL_VERSION else None
+
+    def begin(self, identity, passes, block_size):
+        """Start a fresh journal, or resume a matching one.
+
+        Returns the ``(pass_index, offset)`` to continue from; ``(0, 0)`` for a
+        new wipe. A journal for a different drive or pass list is discarded.
+        """
+        previous = self.load()
+        if previous and previous["target"] == identity and previous["passes"] == list(passes):
+            self.state = previous
+            self.state["resumptions"].append({
+                "resumed_at": _utcnow(),
+                "pass": previous["pass"],
+                "offset": previous["offset"],
+            })
+            self.save()
+            return previous["pass"], previous["offset"]
+        if previous:
+            print(f"[checkpoint] Ignoring journal {self.path}: it belongs to another target or method")
+        self.state = {
+            "version": JOURNAL_VERSION,
+            "target": identity,
+            "passes": list(passes),
+            "block_size": block_size,
+            "started_at": _utcnow(),
+            "pass": 0,
+            "offset": 0,
+            "keys": {},
+            "mismatches": [],
+            "resumptions": [],
+        }
+        self.save()
+        return 0, 0
+
+    @property
+    def resumptions(self):
+        return list(self.state["resumptions"]) if self.state else []
+
+    def pattern_key(self, pass_index):
+        key = self.state["keys"].get(str(pass_index))
+        return (bytes.fromhex(key[0]), bytes.fromhex(key[1])) if key else None
+
+    def set_pattern_key(self, pass_index, key, nonce):
+        self.state["keys"][str(pass_index)] = [key.hex(), nonce.hex()]
+        self.save()
+
+    def checkpoint(self, pass_index, offset, mismatches=None):
+        """Record that everything before ``offset`` of ``pass_index`` is on disk."""
+        self.state["pass"] = pass_index
+        self.state["offset"] = offset
+        if mismatches:
+            self.state["mismatches"].extend(mismatches)
+        self.save()
+
+    def mismatches(self):
+        return [list(r) for r in self.state["mismatches"]] if self.state else []
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def finish(self):
+        """The wipe completed: the journal is no longer needed."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
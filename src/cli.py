@@ -0,0 +1,332 @@
+"""Headless batch wiping driven by a manifest (no Qt).
+
+Usage: python -m src.cli MANIFEST [--jobs N] [--dry-run] [--results FILE]
+                         [--private-key PEM] [--bundle N] [--no-history]
+                         [--metrics-jsonl FILE] [--metrics-textfile FILE]
+                         [--export-url URL] [--export-token TOKEN]
+
+The manifest is a JSON list (or JSON Lines) of objects such as
+``{"target": "/dev/sdb", "method": "disk", "verify": true}``. ``method`` is
+one of file, partition, disk, ssd or os; other keys are passed to the wipe.
+``"method": "auto"`` picks disk or ssd and their options from the drive
+inventory (see src.inventory).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import contextlib
+import threading
+
+from src.jobs import DONE, JobEngine
+from src.metrics import JsonlWriter, write_prometheus_textfile
+from src.methods import get_method
+
+METHODS = ("file", "partition", "disk", "ssd", "os", "auto")
+
+# Options each method accepts from the manifest.
+METHOD_OPTIONS = {
+    "file": ("passes", "chunk_size", "verify", "offload", "wipe_method"),
+    "partition": ("passes", "workers", "overwrite"),
+    "disk": ("block_size", "direct", "verify", "offload", "discard", "resume", "wipe_method",
+             "queue_depth"),
+    "ssd": (),
+    "os": ("block_size", "direct", "verify", "offload", "discard", "resume", "wipe_method",
+           "queue_depth"),
+    "auto": (),
+}
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def load_manifest(path):
+    """Read a JSON list or JSON Lines manifest and validate every entry."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    for idx, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("target"):
+            raise ManifestError(f"entry {idx}: missing target")
+        method = entry.get("method", "file")
+        if method not in METHODS:
+            raise ManifestError(f"entry {idx}: unknown method {method!r}")
+        unknown = set(entry) - {"target", "method"} - set(METHOD_OPTIONS[method])
+        if unknown:
+            raise ManifestError(f"entry {idx}: unsupported options {sorted(unknown)} for {method}")
+        if "wipe_method" in entry:
+            try:
+                get_method(entry["wipe_method"])
+            except ValueError as e:
+                raise ManifestError(f"entry {idx}: {e}") from None
+        entry["method"] = method
+        if method == "auto":
+            resolve_auto(entry, idx)
+    return entries
+
+
+def resolve_auto(entry, idx=0, inventory=None):
+    """Replace an ``auto`` entry's method and options with select_method()'s plan."""
+    from src.inventory import default_inventory, select_method
+    drive = (inventory or default_inventory()).drive_for(entry["target"])
+    if drive is None:
+        plan = {"method": "disk", "options": {}, "reason": "not a known disk: plain overwrite"}
+    else:
+        plan = select_method(drive)
+        if "refused" in plan:
+            raise ManifestError(f"entry {idx}: {plan['refused']}")
+    entry["method"] = plan["method"]
+    entry.update(plan["options"])
+    print(f"[cli] {entry['target']}: {plan['method']} ({plan['reason']})", file=sys.stderr)
+    return entry
+
+
+def plan_entry(entry):
+    """Describe what would happen to one target without touching it."""
+    target = entry["target"]
+    method = entry["method"]
+    plan = {"target": target, "method": method, "status": "planned"}
+    if method == "file":
+        ok = os.path.isfile(target)
+    elif method == "partition":
+        ok = os.path.isdir(target)
+    else:
+        ok = os.path.exists(target)
+    refused = None
+    if ok and method in ("disk", "ssd", "os"):
+        # The same refusal the real run applies (see block_wipe.refuse_in_use).
+        from src.inventory import check_target
+        refused = check_target(target)
+    if not ok:
+        plan["status"] = "invalid"
+        plan["error"] = f"target not found or wrong type for {method}"
+    elif refused:
+        plan["status"] = "invalid"
+        plan["error"] = f"Refusing to wipe: {refused}"
+    elif not os.access(target, os.W_OK):
+        plan["status"] = "invalid"
+        plan["error"] = "target is not writable"
+    elif method != "partition":
+        try:
+            with open(target, 'rb') as f:
+                plan["size"] = f.seek(0, os.SEEK_END)
+        except OSError as e:
+            plan["size"] = None
+            plan["error"] = str(e)
+    return plan
+
+
+def dry_run(entries, jobs=1, private_key_path=None, manifest=None):
+    """Plan every entry and estimate its wipe without writing to any target.
+
+    Each target gets a short read benchmark (see src.dry_run). The plans and
+    their totals go into a dry-run report under the reports directory,
+    signed when a private key is given. Returns the plans.
+    """
+    from src.dry_run import dry_run_totals, estimate_entry
+    from src.reports import REPORTS_DIR, ensure_reports_dir, sign_report
+    plans = []
+    for entry in entries:
+        plan = plan_entry(entry)
+        if plan["status"] == "planned":
+            try:
+                plan["estimate"] = estimate_entry(entry)
+            except OSError as e:
+                plan["estimate_error"] = str(e)
+        plans.append(plan)
+    generated_at = datetime.datetime.utcnow()
+    report_data = {
+        "report_type": "dry_run",
+        "manifest": manifest,
+        "generated_at": generated_at.isoformat() + "Z",
+        "plans": plans,
+        "totals": dry_run_totals(plans, jobs),
+    }
+    if private_key_path:
+        sign_report(report_data, private_key_path)
+    ensure_reports_dir()
+    path = os.path.join(REPORTS_DIR, f"dry_run_{generated_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report_data, f, indent=4)
+    totals = report_data["totals"]
+    print(f"[cli] Dry run: {totals['planned']}/{totals['targets']} targets planned, "
+          f"{totals['bytes_written'] / 1e9:.1f} GB to write, about {totals['seconds_parallel'] / 60:.1f} min "
+          f"with {jobs} job(s); report written to {path}", file=sys.stderr)
+    return plans
+
+
+def job_result(job):
+    result = {
+        "target": job.target,
+        "method": job.kind,
+        "status": job.status,
+        "seconds": round(job.finished_at - job.started_at, 3) if job.started_at and job.finished_at else None,
+        "bytes": job.bytes_done,
+        "throughput_mb_s": round(job.average_throughput / 1e6, 1),
+    }
+    if job.error:
+        result["error"] = job.error
+    elif job.status == "failed":
+        result["error"] = "wipe failed, see log"
+    if job.kind == "file" and isinstance(job.result, dict):
+        result["file_hash"] = job.result.get("file_hash")
+    if job.metrics is not None:
+        # File, disk and OS wipes alike record the read-back check here.
+        if job.metrics.verification is not None:
+            result["verification"] = job.metrics.verification
+        result["metrics"] = job.metrics.as_dict()
+    return result
+
+
+def run_manifest(entries, jobs=1, results=None, private_key_path=None, bundle_size=0, history=True,
+                 on_event=None, metrics_textfile=None, exporter=None):
+    """Run every manifest entry on ``jobs`` workers; returns the result dicts.
+
+    Each result is also written as one JSON line to ``results`` (a file object)
+    as soon as its wipe finishes. File wipes get signed reports when a private
+    key is given, and are recorded in the wipe history unless ``history`` is off.
+    Metrics events go to ``on_event`` as they happen, and the Prometheus
+    textfile ``metrics_textfile`` is rewritten after every finished wipe.
+    With a ReportExporter as ``exporter``, history records and signed reports
+    are spooled for export to the central collector.
+    """
+    lock = threading.Lock()
+    collected = []
+    queue = None
+    if private_key_path:
+        from src.report_queue import ReportQueue
+        queue = ReportQueue(private_key_path, bundle_size=bundle_size)
+    if history:
+        from src.wipe_history import save_wipe_record
+    from src.reports import new_report_id, report_details, report_paths
+
+    def save_record(record):
+        if history:
+            save_wipe_record(record)
+        if exporter is not None:
+            exporter.submit("history", record)
+
+    def report_written(future, record):
+        error = future.exception()
+        if error is not None:
+            print(f"[cli] Report for {record['file_name']} failed: {error}", file=sys.stderr)
+        else:
+            record["json_report_path"], record["pdf_report_path"] = future.result()
+            if exporter is not None:
+                exporter.submit_report_file(record["json_report_path"])
+        save_record(record)
+
+    def finished(job):
+        result = job_result(job)
+        if job.kind == "file" and job.status == DONE:
+            details = report_details(job.result)
+            record = {
+                "file_name": os.path.basename(job.target),
+                "file_hash": job.result["file_hash"],
+                "deleted_at": datetime.datetime.utcnow().isoformat() + "Z",
+            }
+            if queue is not None:
+                report_id = new_report_id()
+                future = queue.submit(job.target, job.result["file_hash"], details, report_id)
+                result["json_report_path"] = report_paths(record["file_name"], report_id)[0]
+                # The record is saved once the report exists: in bundle mode
+                # the PDF is the batch's, known only when the bundle is written.
+                future.add_done_callback(lambda f, record=record: report_written(f, record))
+            else:
+                save_record(record)
+        with lock:
+            collected.append(result)
+            if results is not None:
+                results.write(json.dumps(result) + "\n")
+                results.flush()
+            if metrics_textfile:
+                write_prometheus_textfile([r["metrics"] for r in collected if "metrics" in r], metrics_textfile)
+
+    engine = JobEngine(workers=jobs, on_finished=finished, on_event=on_event)
+    try:
+        for entry in entries:
+            options = {k: v for k, v in entry.items() if k not in ("target", "method")}
+            engine.submit(entry["method"], entry["target"], **options)
+        engine.shutdown(wait=True)
+    except KeyboardInterrupt:
+        engine.cancel_all()
+        engine.shutdown(wait=True)
+        raise
+    finally:
+        if queue is not None:
+            queue.close()
+    return collected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch secure wipe.")
+    parser.add_argument("manifest", help="JSON or JSON Lines manifest of targets")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="targets wiped concurrently")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="plan and estimate wipe times with a read-only benchmark, write nothing")
+    parser.add_argument("--results", help="write JSON Lines results here (default: stdout)")
+    parser.add_argument("--private-key", help="PEM key used to sign file wipe reports")
+    parser.add_argument("--bundle", type=int, default=0, help="batch-sign and bundle PDFs in groups of N")
+    parser.add_argument("--no-history", action="store_true", help="do not record wipes in the history")
+    parser.add_argument("--metrics-jsonl", help="append per-pass metrics events to this JSON Lines file")
+    parser.add_argument("--metrics-textfile", help="write Prometheus metrics here (node_exporter textfile)")
+    parser.add_argument("--export-url", help="ship reports and history records to this collector endpoint")
+    parser.add_argument("--export-token", help="bearer token for the collector")
+    args = parser.parse_args(argv)
+
+    try:
+        entries = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"[cli] Invalid manifest: {e}", file=sys.stderr)
+        return 2
+    exporter = None
+    if args.export_url and not args.dry_run:
+        from src.exporter import ReportExporter
+        try:
+            exporter = ReportExporter(args.export_url, token=args.export_token)
+        except ValueError as e:
+            print(f"[cli] {e}", file=sys.stderr)
+            return 2
+
+    out = open(args.results, 'w', encoding='utf-8') if args.results else sys.stdout
+    try:
+        if args.dry_run:
+            plans = dry_run(entries, jobs=args.jobs, private_key_path=args.private_key,
+                            manifest=args.manifest)
+            for plan in plans:
+                out.write(json.dumps(plan) + "\n")
+            return 0 if all(plan["status"] == "planned" for plan in plans) else 1
+
+        start = time.monotonic()
+        events = JsonlWriter(args.metrics_jsonl) if args.metrics_jsonl else None
+        # Wipe progress messages go to stderr so stdout stays machine-readable.
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                results = run_manifest(entries, jobs=args.jobs, results=out,
+                                       private_key_path=args.private_key, bundle_size=args.bundle,
+                                       history=not args.no_history, on_event=events,
+                                       metrics_textfile=args.metrics_textfile, exporter=exporter)
+        finally:
+            if events is not None:
+                events.close()
+            if exporter is not None:
+                with contextlib.redirect_stdout(sys.stderr):
+                    exporter.close()
+        failed = [r for r in results if r["status"] != DONE]
+        print(f"[cli] {len(results) - len(failed)}/{len(results)} targets wiped in "
+              f"{time.monotonic() - start:.1f}s", file=sys.stderr)
+        return 1 if failed else 0
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Dry-run planning: predict how long a wipe will take without writing anything.
+
+Each target gets a short read microbenchmark (O_DIRECT where possible, so the
+page cache does not flatter it) and each pass pattern a CPU benchmark of how
+fast it can be generated. A pass is then modelled as running at the slower of
+the two, with the device's write speed derived from its read speed by
+WRITE_READ_RATIO. Zero passes the kernel would offload run at write speed on
+devices (BLKZEROOUT) and cost nothing on files (fallocate), except a first
+zero pass, which the wipe always writes; a
+verified final pass adds one more read of the target. Holes in sparse image
+files read faster than the medium, so estimates for them are optimistic.
+"""
+import os
+import time
+import errno
+import functools
+
+from src.block_wipe import DEFAULT_BLOCK_SIZE, DIRECT_IO_ALIGNMENT
+from src.extents import data_extents, extent_bytes
+from src.methods import file_method, get_method, pattern_for
+from src.overwrite import PATTERN_SLACK, align_up, aligned_buffer, chunk_length, pread_into
+
+DEFAULT_SAMPLE_BYTES = 64 * 1024 * 1024
+SAMPLE_WINDOWS = 4
+PATTERN_SAMPLE_BYTES = 64 * 1024 * 1024
+
+# Sustained write speed as a fraction of read speed. Reads cannot tell us
+# the write speed without writing, so this is a calibrated guess: hard disks
+# write about as fast as they read, flash noticeably slower once its cache
+# fills.
+WRITE_READ_RATIO = {"hdd": 0.95, "ssd": 0.6, None: 0.8}
+
+
+def read_throughput(path, sample_bytes=DEFAULT_SAMPLE_BYTES, block_size=DEFAULT_BLOCK_SIZE,
+                    windows=SAMPLE_WINDOWS):
+    """Read ``sample_bytes`` from ``windows`` spots spread over ``path``.
+
+    Nothing is written. Returns ``{"bytes", "seconds", "bytes_per_second",
+    "direct"}``, or None for an empty target.
+    """
+    flags = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+    direct = hasattr(os, "O_DIRECT")
+    try:
+        fd = os.open(path, flags | os.O_DIRECT) if direct else os.open(path, flags)
+    except OSError as e:
+        if e.errno != errno.EINVAL:
+            raise
+        direct = False
+        fd = os.open(path, flags)
+    buffer = aligned_buffer(block_size)
+    view = memoryview(buffer)
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        if not size:
+            return None
+        if not direct and hasattr(os, "posix_fadvise"):
+            # Drop cached pages so the sample measures the medium, not RAM.
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_DONTNEED)
+        window = max(DIRECT_IO_ALIGNMENT, min(sample_bytes // windows, size))
+        window -= window % DIRECT_IO_ALIGNMENT
+        last = max(size - window, 0) // DIRECT_IO_ALIGNMENT * DIRECT_IO_ALIGNMENT
+        offsets = sorted({last * i // max(windows - 1, 1) // DIRECT_IO_ALIGNMENT * DIRECT_IO_ALIGNMENT
+                          for i in range(windows)})
+        done = 0
+        start = time.monotonic()
+        for offset in offsets:
+            end = min(offset + window, size)
+            pos = offset
+            while pos < end:
+                n = pread_into(fd, view[:min(len(buffer), align_up(end - pos, DIRECT_IO_ALIGNMENT))], pos)
+                if n <= 0:
+                    break
+                pos += n
+                done += n
+        seconds = time.monotonic() - start
+    finally:
+        os.close(fd)
+        view.release()
+        buffer.close()
+    return {
+        "bytes": done,
+        "seconds": round(seconds, 6),
+        "bytes_per_second": done / seconds if seconds > 0 else None,
+        "direct": direct,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def pattern_throughput(spec, chunk_size=DEFAULT_BLOCK_SIZE, nbytes=PATTERN_SAMPLE_BYTES):
+    """Bytes per second at which the pattern for ``spec`` can be generated."""
+    pattern = pattern_for(spec)
+    buffer = aligned_buffer(chunk_size + PATTERN_SLACK)
+    try:
+        start = time.monotonic()
+        pattern.prepare(buffer, chunk_size)
+        step = chunk_length(pattern, chunk_size)
+        for offset in range(0, nbytes, step):
+            pattern.fill(buffer, offset, step).release()
+        seconds = time.monotonic() - start
+    finally:
+        buffer.close()
+    return nbytes / seconds if seconds > 0 else float("inf")
+
+
+def _drive_type(target):
+    try:
+        from src.inventory import default_inventory, detect_drive_type
+        drive = default_inventory().drive_for(target)
+    except OSError:
+        return None
+    return detect_drive_type(drive) if drive else None
+
+
+def _tree_size(root):
+    """Bytes the tree wipe would overwrite once, and the largest file (for sampling)."""
+    seen = set()
+    total = 0
+    largest = (0, None)
+    for current, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(current, name)
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if not os.path.isfile(path) or os.path.islink(path) or (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            # Holes are skipped by the wipe; allocated blocks approximate extents.
+            allocated = min(st.st_size, getattr(st, "st_blocks", 0) * 512 or st.st_size)
+            total += allocated
+            largest = max(largest, (st.st_size, path))
+    return total, largest[1]
+
+
+def _passes_for(method, options):
+    if method == "file":
+        spec = options.get("wipe_method") or file_method(options.get("passes", 3))
+    elif method == "partition":
+        spec = file_method(options.get("passes", 1))
+    else:
+        spec = options.get("wipe_method", "nist-clear")
+    wipe_method = get_method(spec)
+    return wipe_method.name, list(wipe_method.passes), options.get("verify", False) or wipe_method.verify
+
+
+def estimate_entry(entry, sample_bytes=DEFAULT_SAMPLE_BYTES):
+    """Predict duration and bytes written for one manifest entry (see src.cli).
+
+    Returns the estimate dict recorded in the dry-run report; ``seconds`` is
+    None for firmware erases, whose duration only the drive knows.
+    """
+    target = entry["target"]
+    method = entry["method"]
+    options = {k: v for k, v in entry.items() if k not in ("target", "method")}
+    if method == "ssd":
+        return {"wipe_method": "ata-secure-erase", "passes": [], "bytes_written": 0, "seconds": None,
+                "note": "firmware erase; the drive reports its own time estimate (hdparm -I)"}
+
+    block_device = False
+    if method == "partition":
+        size, sample_path = _tree_size(target)
+    elif method == "file":
+        fd = os.open(target, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            size = extent_bytes(data_extents(fd, os.fstat(fd).st_size))
+        finally:
+            os.close(fd)
+        sample_path = target
+    else:
+        from src.offload import is_block_device
+        fd = os.open(target, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            size = os.lseek(fd, 0, os.SEEK_END)
+            block_device = is_block_device(fd)
+        finally:
+            os.close(fd)
+        sample_path = target
+
+    name, passes, verify = _passes_for(method, options)
+    benchmark = read_throughput(sample_path, sample_bytes) if sample_path and size else None
+    read_bps = benchmark["bytes_per_second"] if benchmark else None
+    drive_type = _drive_type(target) if block_device else None
+    write_bps = read_bps * WRITE_READ_RATIO[drive_type] if read_bps else None
+    block_size = options.get("block_size", DEFAULT_BLOCK_SIZE)
+    offload = options.get("offload", True)
+
+    estimate = {
+        "wipe_method": name,
+        "size": size,
+        "drive_type": drive_type,
+        "read_benchmark": benchmark,
+        "write_bytes_per_second": round(write_bps) if write_bps else None,
+        "passes": [],
+    }
+    total_seconds = 0.0
+    bytes_written = 0
+    for idx, spec in enumerate(passes):
+        generate_bps = pattern_throughput(spec, block_size)
+        mechanism = "write"
+        # Mirrors the wipe: files only offload a zero pass after pass 0 wrote in place.
+        if offload and pattern_for(spec).name == "zero" and (block_device or idx > 0):
+            mechanism = "blkzeroout" if block_device else "fallocate"
+        if mechanism == "fallocate":
+            # The filesystem drops the blocks: no data is written.
+            seconds, nbytes = 0.0, 0
+        else:
+            rate = write_bps if mechanism != "write" else min(write_bps or 0, generate_bps) or None
+            seconds, nbytes = (size / rate if rate else None), size
+        if verify and idx == len(passes) - 1:
+            seconds = seconds + size / read_bps if seconds is not None and read_bps else None
+        estimate["passes"].append({"pattern": spec, "mechanism": mechanism, "bytes": nbytes,
+                                   "seconds": round(seconds, 3) if seconds is not None else None,
+                                   "verify": verify and idx == len(passes) - 1})
+        bytes_written += nbytes
+        total_seconds = total_seconds + seconds if seconds is not None and total_seconds is not None else None
+    estimate["bytes_written"] = bytes_written
+    estimate["seconds"] = round(total_seconds, 3) if total_seconds is not None else None
+    if options.get("discard"):
+        estimate["note"] = "discard afterwards (not timed)"
+    return estimate
+
+
+def dry_run_totals(plans, jobs=1):
+    """Sum the estimates; ``seconds_parallel`` assumes ``jobs`` workers taking
+    the longest wipes first, ignoring shared-bus contention."""
+    seconds = [p["estimate"]["seconds"] for p in plans if p.get("estimate")]
+    known = sorted((s for s in seconds if s is not None), reverse=True)
+    lanes = [0.0] * max(1, jobs)
+    for s in known:
+        lanes[lanes.index(min(lanes))] += s
+    return {
+        "targets": len(plans),
+        "planned": sum(1 for p in plans if p["status"] == "planned"),
+        "bytes_written": sum(p["estimate"]["bytes_written"] for p in plans if p.get("estimate")),
+        "seconds_serial": round(sum(known), 3),
+        "seconds_parallel": round(max(lanes), 3),
+        "jobs": jobs,
+        "unestimated": len(seconds) - len(known),
+    }
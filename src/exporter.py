@@ -0,0 +1,411 @@
+"""Enterprise export of wipe reports and history records to a central collector.
+
+Records are first spooled to a local SQLite outbox, so nothing is lost if the
+collector or the network is down, and a background thread ships them in
+gzip-compressed JSON batches over one kept-alive HTTP(S) connection. Each
+record carries an idempotency key (the SHA-256 of its canonical JSON) and each
+batch an ``Idempotency-Key`` header, so a batch resent after a lost response
+can be de-duplicated by the collector. Failed sends are retried with
+exponential backoff and jitter, honouring ``Retry-After``.
+
+A stand-in collector for testing, which stores each batch it receives:
+
+    python -m src.exporter serve --port 8750 --dir /tmp/collector
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import argparse
+import datetime
+import threading
+import http.client
+import urllib.parse
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ui'))
+EXPORT_DB = os.path.join(BASE_DIR, "reports", "export_spool.db")
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_BATCH_BYTES = 4 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL = 5.0
+DEFAULT_TIMEOUT = 15.0
+BASE_DELAY = 1.0
+MAX_DELAY = 300.0
+
+# Statuses worth retrying; any other 4xx means the batch itself is rejected.
+_RETRY_STATUSES = {408, 425, 429}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rejected TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (rejected, id);
+"""
+
+
+def _utcnow():
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+def idempotency_key(kind, data):
+    from src.reports import canonical_json
+    return hashlib.sha256(kind.encode("utf-8") + b"\x00" + canonical_json(data)).hexdigest()
+
+
+class ExportSpool:
+    """Durable outbox of records waiting to be exported.
+
+    Adding a record that is already spooled (same kind and contents) is a
+    no-op. Records the collector rejected outright stay in the spool, marked
+    with the reason, instead of being retried forever or silently dropped.
+    """
+
+    def __init__(self, db_path=EXPORT_DB):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def add(self, kind, data):
+        key = idempotency_key(kind, data)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO outbox (idempotency_key, kind, data, created_at) VALUES (?, ?, ?, ?)",
+                    (key, kind, json.dumps(data), _utcnow()),
+                )
+        return key
+
+    def pending(self, limit, max_bytes=None):
+        """The oldest unsent records, as ``(id, key, kind, data_json)``, up to
+        ``limit`` records or ``max_bytes`` of JSON (at least one record)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, idempotency_key, kind, data FROM outbox WHERE rejected IS NULL "
+                "ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        if max_bytes is None:
+            return rows
+        batch, size = [], 0
+        for row in rows:
+            size += len(row[3])
+            if batch and size > max_bytes:
+                break
+            batch.append(row)
+        return batch
+
+    def remove(self, ids):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("DELETE FROM outbox WHERE id = ?", ((i,) for i in ids))
+
+    def attempted(self, ids):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", ((i,) for i in ids))
+
+    def reject(self, ids, reason):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("UPDATE outbox SET rejected = ? WHERE id = ?", ((reason, i) for i in ids))
+
+    def count(self, rejected=False):
+        query = "SELECT COUNT(*) FROM outbox WHERE rejected IS " + ("NOT NULL" if rejected else "NULL")
+        with self._lock:
+            return self._connection().execute(query).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ExportError(Exception):
+    def __init__(self, message, retry=True, retry_after=None):
+        super().__init__(message)
+        self.retry = retry
+        self.retry_after = retry_after
+
+
+class ReportExporter:
+    """Ships spooled records to ``url`` in batches from a background thread.
+
+    ``submit()`` and ``submit_report_file()`` only write to the spool and
+    return immediately, so a slow or unreachable collector never stalls a
+    wipe. A batch is sent once ``batch_size`` records are waiting or every
+    ``flush_interval`` seconds. ``token`` is sent as a bearer token.
+    Anything still spooled at ``close()`` is sent on the next run.
+    """
+
+    def __init__(self, url, spool=None, batch_size=DEFAULT_BATCH_SIZE, max_batch_bytes=DEFAULT_BATCH_BYTES,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, timeout=DEFAULT_TIMEOUT, token=None,
+                 base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Unsupported export URL: {url}")
+        self.url = parsed
+        self.spool = spool or ExportSpool()
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.token = token
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sent = 0
+        self.failures = 0
+        self._conn = None
+        self._backoff_until = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._send_lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, kind, data):
+        """Spool one record (``"report"``, ``"history"``, ...) for export."""
+        key = self.spool.add(kind, data)
+        self._start()
+        if self.spool.count() >= self.batch_size:
+            self._wake.set()
+        return key
+
+    def submit_report_file(self, json_report_path):
+        with open(json_report_path, 'r', encoding='utf-8') as f:
+            return self.submit("report", json.load(f))
+
+    def _connection(self):
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+            self._conn = cls(self.url.hostname, self.url.port, timeout=self.timeout)
+        return self._conn
+
+    def _drop_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _post(self, body, batch_key):
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "Idempotency-Key": batch_key,
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        path = self.url.path or "/"
+        if self.url.query:
+            path += "?" + self.url.query
+        try:
+            conn = self._connection()
+            conn.request("POST", path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as e:
+            # The kept-alive connection may have been closed by the server.
+            self._drop_connection()
+            raise ExportError(f"send failed: {e}") from e
+        if response.will_close:
+            self._drop_connection()
+        if 200 <= response.status < 300:
+            return
+        retry_after = response.getheader("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        retry = response.status >= 500 or response.status in _RETRY_STATUSES
+        raise ExportError(f"collector returned HTTP {response.status}", retry, retry_after)
+
+    def send_batch(self):
+        """Send the oldest spooled batch; returns the number of records sent.
+
+        Raises ExportError when the batch could not be delivered.
+        """
+        with self._send_lock:
+            rows = self.spool.pending(self.batch_size, self.max_batch_bytes)
+            if not rows:
+                return 0
+            ids = [row[0] for row in rows]
+            keys = [row[1] for row in rows]
+            # Records are already JSON; splice them in rather than re-encoding.
+            items = ",".join(
+                f'{{"idempotency_key":{json.dumps(key)},"kind":{json.dumps(kind)},"data":{data}}}'
+                for _, key, kind, data in rows
+            )
+            batch_key = hashlib.sha256("\n".join(keys).encode("ascii")).hexdigest()
+            payload = f'{{"batch_id":"{batch_key}","sent_at":"{_utcnow()}","records":[{items}]}}'
+            body = gzip.compress(payload.encode("utf-8"), compresslevel=6)
+            self.spool.attempted(ids)
+            try:
+                self._post(body, batch_key)
+            except ExportError as e:
+                if not e.retry:
+                    self.spool.reject(ids, str(e))
+                    print(f"[exporter] Batch of {len(ids)} rejected, kept in spool: {e}")
+                raise
+            self.spool.remove(ids)
+            self.sent += len(ids)
+            return len(ids)
+
+    def _delay(self):
+        delay = min(self.max_delay, self.base_delay * 2 ** min(self.failures - 1, 16))
+        # Full jitter keeps a fleet of wipe stations from retrying in lockstep.
+        return random.uniform(0, delay)
+
+    def flush(self, deadline=None):
+        """Send batches until the spool is empty, a send fails, or ``deadline``
+        (a time.monotonic() value) passes. Returns True if the spool is empty."""
+        while deadline is None or time.monotonic() < deadline:
+            if time.monotonic() < self._backoff_until:
+                return False
+            try:
+                if not self.send_batch():
+                    return True
+                self.failures = 0
+            except ExportError as e:
+                if not e.retry:
+                    continue
+                self.failures += 1
+                delay = e.retry_after if e.retry_after is not None else self._delay()
+                self._backoff_until = time.monotonic() + delay
+                print(f"[exporter] {e}; retrying in {delay:.1f}s")
+                return False
+        return False
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="report-exporter", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(max(self.flush_interval, self._backoff_until - time.monotonic()))
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.flush()
+
+    def close(self, timeout=30.0):
+        """Stop the background thread and try to send what is left for up to
+        ``timeout`` seconds; whatever is still spooled is sent next time.
+        Returns the number of records left in the spool."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._backoff_until = 0.0
+        self.flush(time.monotonic() + timeout)
+        remaining = self.spool.count()
+        if remaining:
+            print(f"[exporter] {remaining} records left in the spool for the next run")
+        self._drop_connection()
+        self.spool.close()
+        return remaining
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def serve_collector(port, directory, host="127.0.0.1"):
+    """Run a stand-in collector that stores each batch as ``<batch_id>.json``.
+
+    Batches and records it has already seen (by idempotency key) are
+    acknowledged but not stored again.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    os.makedirs(directory, exist_ok=True)
+    seen = set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                batch = json.loads(body)
+                records = batch["records"]
+            except (OSError, ValueError, KeyError, TypeError):
+                return self._reply(400, {"error": "malformed batch"})
+            with lock:
+                new = [r for r in records if r["idempotency_key"] not in seen]
+                seen.update(r["idempotency_key"] for r in new)
+            if new:
+                batch_id = self.headers.get("Idempotency-Key") or batch.get("batch_id")
+                with open(os.path.join(directory, f"{batch_id}.json"), 'w', encoding='utf-8') as f:
+                    json.dump({**batch, "records": new}, f)
+            self._reply(200, {"accepted": len(new), "duplicates": len(records) - len(new)})
+
+        def _reply(self, status, data):
+            payload = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, fmt, *args):
+            print(f"[collector] {fmt % args}", file=sys.stderr)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"[collector] Listening on http://{host}:{server.server_address[1]}/, storing batches in {directory}")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report export tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run a local stand-in collector")
+    serve.add_argument("--port", type=int, default=8750)
+    serve.add_argument("--dir", required=True, help="where received batches are stored")
+    flush = sub.add_parser("flush", help="send what is left in the export spool")
+    flush.add_argument("url", help="collector endpoint")
+    flush.add_argument("--token", help="bearer token for the collector")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = serve_collector(args.port, args.dir)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+    exporter = ReportExporter(args.url, token=args.token)
+    remaining = exporter.close()
+    print(f"[exporter] Sent {exporter.sent} records")
+    return 1 if remaining else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import os
+import errno
+
+
+def data_extents(fd, size):
+    """Return the ``(start, end)`` ranges of ``fd`` below ``size`` that hold data.
+
+    Uses SEEK_DATA/SEEK_HOLE. Holes, and on most filesystems preallocated but
+    never written ranges, read back as zeros and are left out. Where the
+    platform or filesystem cannot report holes the whole file is one extent.
+    """
+    if size <= 0:
+        return []
+    if not hasattr(os, "SEEK_DATA"):
+        return [(0, size)]
+    extents = []
+    offset = 0
+    try:
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                # ENXIO: nothing but holes from offset to the end of the file
+                if e.errno == errno.ENXIO:
+                    break
+                raise
+            if start >= size:
+                break
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+            extents.append((start, end))
+            offset = end
+    except OSError as e:
+        if e.errno in (errno.EINVAL, errno.EOPNOTSUPP):
+            return [(0, size)]
+        raise
+    return extents
+
+
+def extent_bytes(extents):
+    return sum(end - start for start, end in extents)
+
+
+def for_each_extent(extents, func, progress=None):
+    """Call ``func(offset, length, progress)`` for every extent; returns the results.
+
+    The ``progress(done, total)`` handed to ``func`` counts bytes across all
+    extents, so callers see one continuous pass.
+    """
+    total = extent_bytes(extents)
+    base = 0
+    results = []
+    for start, end in extents:
+        report = None
+        if progress:
+            report = lambda done, length, base=base: progress(base + done, total)
+        results.append(func(start, end - start, report))
+        base += end - start
+    return results
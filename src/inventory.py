@@ -0,0 +1,255 @@
+"""Drive inventory from sysfs and automatic wipe method selection.
+
+One scan of ``<sysfs_root>/block`` describes every disk: size, rotational
+flag, logical and physical block size, discard support, model, serial and
+partitions. Mount and swap state come from ``/proc`` and are read fresh on
+every query, since they decide whether a disk may be wiped at all. The sysfs
+part is cached until a device or partition appears or disappears (hotplug),
+or ``max_age`` seconds pass. All paths are configurable so a fake tree can
+stand in for /sys and /proc.
+"""
+import os
+import stat
+import time
+import threading
+
+from src.block_wipe import DEFAULT_BLOCK_SIZE
+from src.overwrite import align_up
+from src.striped import DEFAULT_QUEUE_DEPTH
+from src.sysfs import disk_ids, read_sysfs
+
+SECTOR_SIZE = 512
+DEFAULT_MAX_AGE = 30.0
+
+# A disk holding any of these mount points is the running system's.
+SYSTEM_MOUNTS = ("/", "/boot", "/boot/efi", "/usr", "/var", "/home")
+
+# Virtual devices that never hold user data worth wiping.
+_SKIP_PREFIXES = ("ram", "zram", "loop", "sr", "fd", "md", "dm-")
+
+
+def _read_int(path, default=0):
+    value = read_sysfs(path)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _unescape_mount(field):
+    # /proc/mounts escapes spaces, tabs, newlines and backslashes as octal.
+    for code, char in (("\\040", " "), ("\\011", "\t"), ("\\012", "\n"), ("\\134", "\\")):
+        field = field.replace(code, char)
+    return field
+
+
+def _scan_disk(block_dir, name):
+    disk = os.path.join(block_dir, name)
+    queue = os.path.join(disk, "queue")
+    logical = _read_int(os.path.join(queue, "logical_block_size"), SECTOR_SIZE)
+    physical = _read_int(os.path.join(queue, "physical_block_size"), logical)
+    partitions = sorted(entry for entry in os.listdir(disk)
+                        if os.path.exists(os.path.join(disk, entry, "partition")))
+    # device-mapper / md devices built on the disk or any of its partitions
+    holders = set()
+    for holder_dir in [os.path.join(disk, "holders")] + [os.path.join(disk, p, "holders") for p in partitions]:
+        if os.path.isdir(holder_dir):
+            holders.update(os.listdir(holder_dir))
+    device = os.path.join(disk, "device")
+    vendor = read_sysfs(os.path.join(device, "vendor"))
+    ids = disk_ids(disk)
+    return {
+        "name": name,
+        "path": f"/dev/{name}",
+        # sysfs sizes are always in 512-byte sectors, whatever the block size.
+        "size": _read_int(os.path.join(disk, "size")) * SECTOR_SIZE,
+        "rotational": _read_int(os.path.join(queue, "rotational"), 1) == 1,
+        "logical_block_size": logical,
+        "physical_block_size": physical,
+        "discard": _read_int(os.path.join(queue, "discard_max_bytes")) > 0,
+        "discard_granularity": _read_int(os.path.join(queue, "discard_granularity")),
+        "model": read_sysfs(os.path.join(device, "model")) or read_sysfs(os.path.join(disk, "model")),
+        "serial": ids.get("serial"),
+        "wwid": ids.get("wwid"),
+        "vendor": vendor,
+        "transport": "nvme" if name.startswith("nvme") else ("ata" if vendor == "ATA" else None),
+        "removable": _read_int(os.path.join(disk, "removable")) == 1,
+        "read_only": _read_int(os.path.join(disk, "ro")) == 1,
+        "partitions": partitions,
+        "holders": sorted(holders),
+    }
+
+
+class DriveInventory:
+    """Cached view of the disks on this machine (see the module docstring)."""
+
+    def __init__(self, sysfs_root="/sys", mounts_path="/proc/self/mounts", swaps_path="/proc/swaps",
+                 max_age=DEFAULT_MAX_AGE):
+        self.sysfs_root = sysfs_root
+        self.mounts_path = mounts_path
+        self.swaps_path = swaps_path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._disks = None
+        self._fingerprint = None
+        self._scanned_at = 0.0
+
+    def _block_names(self):
+        # class/block lists partitions too, so repartitioning also invalidates.
+        try:
+            return tuple(sorted(os.listdir(os.path.join(self.sysfs_root, "class", "block"))))
+        except OSError:
+            return ()
+
+    def invalidate(self):
+        with self._lock:
+            self._disks = None
+
+    def _scan(self):
+        block_dir = os.path.join(self.sysfs_root, "block")
+        disks = {}
+        for name in sorted(os.listdir(block_dir)) if os.path.isdir(block_dir) else []:
+            if name.startswith(_SKIP_PREFIXES):
+                continue
+            try:
+                disk = _scan_disk(block_dir, name)
+            except OSError as e:
+                # The device went away mid-scan; the next scan will settle it.
+                print(f"[inventory] Skipping {name}: {e}")
+                continue
+            if disk["size"]:
+                disks[name] = disk
+        return disks
+
+    def _cached_disks(self):
+        fingerprint = self._block_names()
+        with self._lock:
+            stale = time.monotonic() - self._scanned_at > self.max_age
+            if self._disks is None or fingerprint != self._fingerprint or stale:
+                self._disks = self._scan()
+                self._fingerprint = fingerprint
+                self._scanned_at = time.monotonic()
+            return self._disks
+
+    def _owner(self, name, disks):
+        """The disk(s) a block device name (disk, partition or dm/md) lives on."""
+        if name in disks:
+            return {name}
+        for disk in disks.values():
+            if name in disk["partitions"]:
+                return {disk["name"]}
+        slaves = os.path.join(self.sysfs_root, "class", "block", name, "slaves")
+        owners = set()
+        if os.path.isdir(slaves):
+            for slave in os.listdir(slaves):
+                owners |= self._owner(slave, disks)
+        return owners
+
+    def _usage(self, disks):
+        mounts, swaps = {}, {}
+        sources = []
+        for line in (read_sysfs(self.mounts_path) or "").splitlines():
+            fields = line.split()
+            if len(fields) >= 2 and fields[0].startswith("/dev/"):
+                sources.append((fields[0], _unescape_mount(fields[1]), mounts))
+        for line in (read_sysfs(self.swaps_path) or "").splitlines()[1:]:
+            fields = line.split()
+            if fields and fields[0].startswith("/dev/"):
+                sources.append((fields[0], "[swap]", swaps))
+        for source, mount_point, usage in sources:
+            name = os.path.basename(os.path.realpath(source))
+            for owner in self._owner(name, disks):
+                usage.setdefault(owner, []).append(mount_point)
+        return mounts, swaps
+
+    def drives(self):
+        """Every disk, with current ``mounts`` and ``system`` flags, by name."""
+        disks = self._cached_disks()
+        mounts, swaps = self._usage(disks)
+        drives = {}
+        for name, disk in disks.items():
+            drive = dict(disk)
+            drive["mounts"] = sorted(mounts.get(name, []))
+            drive["swap"] = name in swaps
+            drive["system"] = drive["swap"] or any(m in SYSTEM_MOUNTS for m in drive["mounts"])
+            drives[name] = drive
+        return drives
+
+    def drive_for(self, path):
+        """The inventory entry of the disk behind ``path``, or None for files
+        and unknown devices. A partition path returns its disk."""
+        try:
+            if not stat.S_ISBLK(os.stat(path).st_mode):
+                return None
+        except OSError:
+            # Not present here: look the name up anyway (e.g. in a fake tree).
+            pass
+        name = os.path.basename(os.path.realpath(path))
+        drives = self.drives()
+        owners = self._owner(name, drives)
+        return drives[owners.pop()] if len(owners) == 1 else None
+
+
+def refusal_reason(drive):
+    """Why ``drive`` must not be wiped, or None if it may be."""
+    if drive["system"]:
+        return f"{drive['path']} holds the running system ({', '.join(drive['mounts']) or 'swap'})"
+    if drive["mounts"]:
+        return f"{drive['path']} is mounted at {', '.join(drive['mounts'])}"
+    if drive["holders"]:
+        return f"{drive['path']} is in use by {', '.join(drive['holders'])}"
+    if drive["read_only"]:
+        return f"{drive['path']} is read-only"
+    return None
+
+
+def detect_drive_type(drive):
+    """``"hdd"`` for rotational disks, else ``"ssd"`` (flash, including NVMe)."""
+    return "hdd" if drive["rotational"] else "ssd"
+
+
+def select_method(drive):
+    """Pick the fastest safe way to wipe ``drive``.
+
+    Returns a plan ``{"method", "options", "reason"}`` in manifest terms
+    (see src.cli), or ``{"refused": reason}``. SATA SSDs get the firmware
+    Secure Erase. Other flash (NVMe, USB) is overwritten with several
+    writes in flight, then discarded where the device supports it. Hard
+    disks are overwritten sequentially. The block size is rounded up to the
+    physical sector size.
+    """
+    reason = refusal_reason(drive)
+    if reason:
+        return {"refused": reason}
+    block_size = align_up(DEFAULT_BLOCK_SIZE, max(drive["physical_block_size"], SECTOR_SIZE))
+    options = {"block_size": block_size, "direct": True}
+    if detect_drive_type(drive) == "hdd":
+        # One sequential stream: more queue depth only adds seeks.
+        return {"method": "disk", "options": options,
+                "reason": "rotational disk: sequential overwrite"}
+    if drive["transport"] == "ata" and not drive["removable"]:
+        return {"method": "ssd", "options": {},
+                "reason": "SATA SSD: firmware Secure Erase also clears over-provisioned blocks"}
+    options["queue_depth"] = DEFAULT_QUEUE_DEPTH
+    options["discard"] = drive["discard"]
+    return {"method": "disk", "options": options,
+            "reason": "flash: striped overwrite" + (" then discard" if drive["discard"] else "")}
+
+
+_default = None
+
+
+def default_inventory():
+    global _default
+    if _default is None:
+        _default = DriveInventory()
+    return _default
+
+
+def check_target(path, inventory=None):
+    """Refusal reason for wiping the device at ``path``, or None.
+
+    Image files and devices missing from the inventory are not refused here.
+    """
+    drive = (inventory or default_inventory()).drive_for(path)
+    return refusal_reason(drive) if drive else None
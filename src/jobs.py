@@ -0,0 +1,214 @@
+import math
+import time
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.block_wipe import refuse_in_use
+from src.methods import get_method
+from src.metrics import WipeMetrics
+from src.wipe_utils import (
+    secure_erase_ssd_nist, wipe_disk_nist_compliant, wipe_file_detailed, wipe_os, wipe_partition
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Minimum seconds between progress notifications for one job.
+UPDATE_INTERVAL = 0.2
+
+# Time constant (seconds) of the moving throughput average, and the shortest
+# interval sampled into it: short enough that a stalling disk shows within
+# seconds, long enough to smooth over individual fsyncs.
+RATE_WINDOW = 2.0
+RATE_SAMPLE_INTERVAL = 0.1
+
+
+class WipeCancelled(Exception):
+    pass
+
+
+class WipeJob:
+    """One queued wipe plus its live progress.
+
+    ``kind`` is ``"file"``, ``"partition"``, ``"disk"``, ``"ssd"`` or ``"os"``. Progress fields are
+    updated from the worker thread: ``pass_index``/``passes``, ``bytes_done``
+    and ``total_bytes`` across all passes, ``throughput`` in bytes per second
+    over roughly the last RATE_WINDOW seconds (so a stalling disk shows up
+    quickly), ``average_throughput`` since the start, and ``eta`` in seconds
+    based on the recent rate (None while unknown). ``metrics`` holds the
+    WipeMetrics of the run once it has started.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, target, options=None):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.target = target
+        self.options = options or {}
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.pass_index = 0
+        self.passes = None
+        self.bytes_done = 0
+        self.total_bytes = None
+        self.files_done = 0
+        self.throughput = 0.0
+        self.average_throughput = 0.0
+        self.eta = None
+        self.started_at = None
+        self.finished_at = None
+        self.metrics = None
+        self._cancel = threading.Event()
+        self._last_update = 0.0
+        self._rate_sample = None
+        self.future = None
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = CANCELLED
+
+
+class JobEngine:
+    """Runs wipe jobs on worker threads with progress and cancellation.
+
+    Jobs beyond ``workers`` wait in FIFO order. ``on_update(job)`` is called
+    (throttled) as a job progresses and ``on_finished(job)`` once it ends; both
+    run on the worker thread, so GUI callers must marshal them themselves.
+    Cancelling a running job raises WipeCancelled from inside the wipe loop at
+    the next chunk boundary. ``on_event(event)`` receives every job's metrics
+    events (see WipeMetrics) from the worker threads.
+    """
+
+    def __init__(self, workers=1, on_update=None, on_finished=None, on_event=None):
+        self.on_update = on_update
+        self.on_finished = on_finished
+        self.on_event = on_event
+        self.jobs = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wipe-job")
+
+    def submit(self, kind, target=None, **options):
+        job = WipeJob(kind, target, options)
+        self.jobs[job.id] = job
+        job.future = self._pool.submit(self._run, job)
+        job.future.add_done_callback(lambda future, job=job: self._cancelled_while_queued(job, future))
+        return job
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job:
+            job.cancel()
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            if job.status in (QUEUED, RUNNING):
+                job.cancel()
+
+    def active(self):
+        return [job for job in self.jobs.values() if job.status in (QUEUED, RUNNING)]
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _cancelled_while_queued(self, job, future):
+        if future.cancelled():
+            job.status = CANCELLED
+            if self.on_finished:
+                self.on_finished(job)
+
+    def _progress(self, job, pass_index, bytes_done, total_bytes):
+        if job.cancelled:
+            raise WipeCancelled(f"wipe of {job.target or 'OS disk'} cancelled")
+        job.pass_index = pass_index
+        if total_bytes is not None and job.passes:
+            job.total_bytes = total_bytes * job.passes
+            job.bytes_done = pass_index * total_bytes + bytes_done
+        else:
+            job.bytes_done = bytes_done
+        now = time.monotonic()
+        elapsed = now - job.started_at
+        if elapsed > 0:
+            job.average_throughput = job.bytes_done / elapsed
+        if job._rate_sample is None:
+            # The first report may include bytes done before a resume.
+            job._rate_sample = (now, job.bytes_done)
+        elif now - job._rate_sample[0] >= RATE_SAMPLE_INTERVAL:
+            then, before = job._rate_sample
+            rate = max(job.bytes_done - before, 0) / (now - then)
+            if job.throughput:
+                weight = 1 - math.exp(-(now - then) / RATE_WINDOW)
+                job.throughput += weight * (rate - job.throughput)
+            else:
+                job.throughput = rate
+            job._rate_sample = (now, job.bytes_done)
+        if job.total_bytes and job.throughput:
+            job.eta = (job.total_bytes - job.bytes_done) / job.throughput
+        if self.on_update and (now - job._last_update >= UPDATE_INTERVAL or bytes_done == total_bytes):
+            job._last_update = now
+            self.on_update(job)
+
+    def _tree_progress(self, job, files_done, bytes_written):
+        job.files_done = files_done
+        self._progress(job, 0, bytes_written, None)
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = time.monotonic()
+        job.metrics = WipeMetrics(job.target, job.kind, listener=self.on_event)
+        progress = lambda idx, done, total: self._progress(job, idx, done, total)
+        options = dict(job.options, metrics=job.metrics)
+        try:
+            if job.kind in ("disk", "ssd", "os"):
+                # The wipe functions refuse too, but wipe_os only logs why.
+                refuse_in_use(job.target or options.get("disk_device", "/dev/sda"))
+            if job.kind == "file":
+                if options.get("wipe_method"):
+                    job.passes = len(get_method(options["wipe_method"]).passes)
+                else:
+                    job.passes = options.get("passes", 3) + 1
+                job.result = wipe_file_detailed(job.target, progress=progress, **options)
+                ok = bool(job.result and job.result["deleted"])
+            elif job.kind == "partition":
+                ok = job.result = wipe_partition(
+                    job.target, progress=lambda files, written: self._tree_progress(job, files, written),
+                    **options)
+            elif job.kind == "disk":
+                job.passes = len(get_method(options.get("wipe_method", "nist-clear")).passes)
+                ok = job.result = wipe_disk_nist_compliant(job.target, progress=progress, **options)
+            elif job.kind == "ssd":
+                ok = job.result = secure_erase_ssd_nist(job.target, metrics=job.metrics)
+            elif job.kind == "os":
+                job.passes = len(get_method(options.get("wipe_method", "nist-clear")).passes)
+                if job.target:
+                    options["disk_device"] = job.target
+                ok = job.result = wipe_os(progress=progress, **options)
+            else:
+                raise ValueError(f"Unknown job kind: {job.kind}")
+            # The wipe functions report errors (including our cancellation) by
+            # return value, so the cancel flag decides why an unfinished job ended.
+            if job.cancelled and not ok:
+                job.status = CANCELLED
+            else:
+                job.status = DONE if ok else FAILED
+        except WipeCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        job.finished_at = time.monotonic()
+        job.metrics.finish(job.status)
+        if self.on_update:
+            self.on_update(job)
+        if self.on_finished:
+            self.on_finished(job)
+        return job
@@ -0,0 +1,107 @@
+from src.overwrite import FixedPattern, RandomPattern, ZeroPattern
+
+# NIST SP 800-88 Clear: random, zeros, random.
+NIST_CLEAR_PASSES = ("random", "zero", "random")
+
+# DoD 5220.22-M: a character, its complement, then random data, verified.
+DOD_PASSES = ("zero", "ones", "random")
+
+# Default for files: random passes, then zeros so the freed blocks read back empty.
+DEFAULT_FILE_PASSES = 3
+
+# Gutmann (1996): 4 random passes, 27 fixed MFM/RLL patterns, 4 random passes.
+GUTMANN_PASSES = (
+    ("random",) * 4
+    + ("0x55", "0xaa", "0x924924", "0x492492", "0x249249")
+    + tuple(f"0x{value:02x}" for value in range(0x00, 0x100, 0x11))
+    + ("0x924924", "0x492492", "0x249249", "0x6db6db", "0xb6db6d", "0xdb6db6")
+    + ("random",) * 4
+)
+
+
+def pattern_for(spec):
+    """Build the pattern for one pass.
+
+    ``spec`` is ``"random"``, ``"zero"``, ``"ones"`` or a hex byte string such
+    as ``"0x924924"``, which is repeated over the whole target.
+    """
+    if spec == "random":
+        return RandomPattern()
+    if spec == "zero":
+        return ZeroPattern()
+    if spec == "ones":
+        return FixedPattern(b"\xff", "ones")
+    if isinstance(spec, str) and spec.lower().startswith("0x"):
+        return FixedPattern(bytes.fromhex(spec[2:]), spec.lower())
+    raise ValueError(f"Unknown pass pattern: {spec!r}")
+
+
+def expectation_for(spec):
+    """What the sampling verifier (verify_sampled) should find after ``spec``."""
+    if spec in ("random", "zero"):
+        return spec
+    return pattern_for(spec).data
+
+
+class WipeMethod:
+    """A named sequence of passes and how its result is to be verified.
+
+    ``verify`` says whether the method requires the final pass to be read
+    back; ``expected`` is what that pass leaves on the medium.
+    """
+
+    def __init__(self, name, passes, description="", verify=False):
+        for spec in passes:
+            pattern_for(spec)  # reject bad specs up front
+        self.name = name
+        self.passes = tuple(passes)
+        self.description = description
+        self.verify = verify
+
+    @property
+    def expected(self):
+        return expectation_for(self.passes[-1])
+
+    def __repr__(self):
+        return f"WipeMethod({self.name!r}, {len(self.passes)} passes)"
+
+
+METHODS = {}
+
+
+def register_method(name, passes, description="", verify=False):
+    METHODS[name] = WipeMethod(name, passes, description, verify)
+    return METHODS[name]
+
+
+def get_method(method):
+    """Look up a registered method by name; a list of pass specs is a custom method."""
+    if isinstance(method, WipeMethod):
+        return method
+    if isinstance(method, (list, tuple)):
+        return WipeMethod("custom", method, "Custom pass sequence")
+    try:
+        return METHODS[method]
+    except KeyError:
+        # "standard-N", as file_method names non-default pass counts.
+        prefix, _, count = str(method).partition("-")
+        if prefix == "standard" and count.isdigit():
+            return file_method(int(count))
+        raise ValueError(f"Unknown wipe method: {method!r} (known: {', '.join(sorted(METHODS))})") from None
+
+
+def file_method(passes=DEFAULT_FILE_PASSES):
+    """The default file sequence: ``passes`` random passes, then zeros."""
+    if passes == DEFAULT_FILE_PASSES:
+        return METHODS["standard"]
+    return WipeMethod(f"standard-{passes}", ("random",) * passes + ("zero",),
+                      f"{passes} random passes, then zeros")
+
+
+register_method("zero", ("zero",), "Single zero pass")
+register_method("random", ("random",), "Single random pass")
+register_method("nist-clear", NIST_CLEAR_PASSES, "NIST SP 800-88 Clear: random, zeros, random")
+register_method("dod", DOD_PASSES, "DoD 5220.22-M: zeros, ones, random, verified", verify=True)
+register_method("gutmann", GUTMANN_PASSES, "Gutmann 35-pass")
+register_method("standard", ("random",) * DEFAULT_FILE_PASSES + ("zero",),
+                "3 random passes, then zeros (file default)")
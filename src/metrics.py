@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import datetime
+import threading
+
+# Upper bounds, in seconds, of the fsync latency histogram buckets.
+FSYNC_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _utcnow():
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+class WipeMetrics:
+    """I/O instrumentation for one wipe.
+
+    Records bytes, duration and throughput per pass, a histogram of fsync
+    latencies, retries, errors and the final pass's read-back result. If ``listener(event)`` is given, it gets a
+    dict for each finished pass, retry and error, and one when the wipe ends,
+    as they happen. A WipeMetrics is written by a single wipe thread.
+    """
+
+    def __init__(self, target=None, method=None, listener=None):
+        self.target = target
+        self.method = method
+        self.listener = listener
+        self.started_at = _utcnow()
+        self.finished_at = None
+        self.status = None
+        self.passes = []
+        self.fsync_counts = [0] * len(FSYNC_BUCKETS)
+        self.fsync_count = 0
+        self.fsync_seconds = 0.0
+        self.fsync_max = 0.0
+        self.retries = 0
+        self.errors = []
+        self.resumptions = []
+        self.verification = None
+        self._start = time.monotonic()
+        self._elapsed = None
+        self._pass = None
+
+    def begin_pass(self, pattern):
+        self._pass = (pattern, time.monotonic())
+
+    def end_pass(self, nbytes, mechanism="write"):
+        """Close the current pass; ``nbytes`` may be None when the device did the work.
+
+        ``mechanism`` names how the pass was carried out (plain writes or a
+        kernel offload such as ``"blkzeroout"``).
+        """
+        pattern, start = self._pass
+        self._pass = None
+        seconds = time.monotonic() - start
+        entry = {
+            "pass": len(self.passes) + 1,
+            "pattern": pattern,
+            "mechanism": mechanism,
+            "bytes": nbytes,
+            "seconds": round(seconds, 6),
+            "throughput_mb_s": round(nbytes / seconds / 1e6, 1) if nbytes and seconds > 0 else None,
+        }
+        self.passes.append(entry)
+        self._emit("pass", **entry)
+
+    def fsync(self, fd):
+        start = time.monotonic()
+        os.fsync(fd)
+        self.observe_fsync(time.monotonic() - start)
+
+    def observe_fsync(self, seconds):
+        self.fsync_count += 1
+        self.fsync_seconds += seconds
+        self.fsync_max = max(self.fsync_max, seconds)
+        for i, bound in enumerate(FSYNC_BUCKETS):
+            if seconds <= bound:
+                self.fsync_counts[i] += 1
+                break
+
+    def retry(self, reason):
+        self.retries += 1
+        self._emit("retry", reason=reason)
+
+    def error(self, error):
+        self.errors.append(str(error))
+        self._emit("error", error=str(error))
+
+    def resumed(self, resumption):
+        """Note that the wipe continued from a checkpoint (see CheckpointJournal)."""
+        self.resumptions.append(dict(resumption))
+        self._emit("resume", **resumption)
+
+    def verified(self, verification):
+        """Record the read-back check of the final pass (``passed``, ``mismatches``)."""
+        self.verification = dict(verification)
+        self._emit("verification", **verification)
+
+    def finish(self, status):
+        self.status = status
+        self.finished_at = _utcnow()
+        self._elapsed = time.monotonic() - self._start
+        self._emit("end", status=status, seconds=round(self._elapsed, 6),
+                   bytes=sum(p["bytes"] or 0 for p in self.passes), retries=self.retries,
+                   errors=len(self.errors))
+
+    def as_dict(self):
+        elapsed = self._elapsed if self._elapsed is not None else time.monotonic() - self._start
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(FSYNC_BUCKETS, self.fsync_counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        data = {
+            "target": self.target,
+            "method": self.method,
+            "started_at": self.started_at,
+            "seconds": round(elapsed, 6),
+            "passes": list(self.passes),
+            "fsync": {
+                "count": self.fsync_count,
+                "seconds_total": round(self.fsync_seconds, 6),
+                "max_seconds": round(self.fsync_max, 6),
+                "buckets": buckets,
+            },
+            "retries": self.retries,
+            "errors": list(self.errors),
+        }
+        if self.resumptions:
+            data["resumptions"] = list(self.resumptions)
+        if self.verification is not None:
+            data["verification"] = dict(self.verification)
+        if self.status is not None:
+            data["status"] = self.status
+            data["finished_at"] = self.finished_at
+        return data
+
+    def _emit(self, event, **fields):
+        if self.listener:
+            self.listener({"event": event, "time": _utcnow(), "target": self.target,
+                           "method": self.method, **fields})
+
+
+class JsonlWriter:
+    """Appends events to ``path`` as JSON Lines; usable as a WipeMetrics listener
+    shared by several wipe threads."""
+
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self._file.write(json.dumps(event) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_text(metrics):
+    """Render ``as_dict()`` results in the Prometheus text exposition format."""
+    series = {
+        "secure_wipe_pass_bytes": ("gauge", "Bytes written by a wipe pass.", []),
+        "secure_wipe_pass_seconds": ("gauge", "Duration of a wipe pass.", []),
+        "secure_wipe_pass_throughput_bytes_per_second": ("gauge", "Write throughput of a wipe pass.", []),
+        "secure_wipe_fsync_seconds": ("histogram", "fsync latency during a wipe.", []),
+        "secure_wipe_retries_total": ("counter", "I/O retries during a wipe.", []),
+        "secure_wipe_errors_total": ("counter", "Errors during a wipe.", []),
+        "secure_wipe_success": ("gauge", "1 if the wipe finished successfully.", []),
+        "secure_wipe_verification_passed": ("gauge", "1 if the final pass read back as written.", []),
+    }
+    for data in metrics:
+        target = {"target": data["target"] or "", "method": data["method"] or ""}
+        for p in data["passes"]:
+            labels = _labels(**target, **{"pass": p["pass"], "pattern": p["pattern"],
+                                          "mechanism": p.get("mechanism", "write")})
+            if p["bytes"] is not None:
+                series["secure_wipe_pass_bytes"][2].append(f"{labels} {p['bytes']}")
+            series["secure_wipe_pass_seconds"][2].append(f"{labels} {p['seconds']}")
+            if p["bytes"] and p["seconds"]:
+                series["secure_wipe_pass_throughput_bytes_per_second"][2].append(
+                    f"{labels} {p['bytes'] / p['seconds']:.1f}")
+        fsync = data["fsync"]
+        lines = series["secure_wipe_fsync_seconds"][2]
+        for bound, count in fsync["buckets"].items():
+            lines.append(f"_bucket{_labels(**target, le=bound)} {count}")
+        lines.append(f"_bucket{_labels(**target, le='+Inf')} {fsync['count']}")
+        lines.append(f"_sum{_labels(**target)} {fsync['seconds_total']}")
+        lines.append(f"_count{_labels(**target)} {fsync['count']}")
+        series["secure_wipe_retries_total"][2].append(f"{_labels(**target)} {data['retries']}")
+        series["secure_wipe_errors_total"][2].append(f"{_labels(**target)} {len(data['errors'])}")
+        if "status" in data:
+            series["secure_wipe_success"][2].append(f"{_labels(**target)} {int(data['status'] == 'done')}")
+        if "verification" in data:
+            series["secure_wipe_verification_passed"][2].append(
+                f"{_labels(**target)} {int(data['verification']['passed'])}")
+
+    out = []
+    for name, (kind, help_text, samples) in series.items():
+        if not samples:
+            continue
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        # Samples start with their labels, or with _bucket/_sum/_count for histograms.
+        out.extend(name + sample for sample in samples)
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus_textfile(metrics, path):
+    """Write ``metrics`` for node_exporter's textfile collector.
+
+    The file is replaced atomically so the collector never reads half of it.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text(metrics))
+    os.replace(tmp_path, path)
+    return path
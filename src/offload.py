@@ -0,0 +1,122 @@
+"""Zeroing and discard done by the kernel instead of writing buffers.
+
+Files use fallocate(2) ZERO_RANGE (or PUNCH_HOLE, which also reads back as
+zeros); block devices use the BLKZEROOUT, BLKSECDISCARD and BLKDISCARD
+ioctls. Every helper returns the name of the mechanism it used, or None when
+the platform, filesystem or device does not support it, so callers can fall
+back to ordinary writes.
+"""
+import os
+import stat
+import errno
+import struct
+import ctypes
+
+FALLOC_FL_KEEP_SIZE = 0x01
+FALLOC_FL_PUNCH_HOLE = 0x02
+FALLOC_FL_ZERO_RANGE = 0x10
+
+# _IO(0x12, n) from <linux/fs.h>; each takes a {start, length} uint64 pair.
+BLKDISCARD = 0x1277
+BLKSECDISCARD = 0x127d
+BLKZEROOUT = 0x127f
+
+# Ranges are handed to the kernel this much at a time, so progress and
+# cancellation still happen between calls.
+OFFLOAD_STEP = 1024 * 1024 * 1024
+
+_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS, errno.ENODEV}
+
+_fallocate = None
+
+
+def _libc_fallocate():
+    global _fallocate
+    if _fallocate is None:
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            # fallocate64 takes a 64-bit off_t even on 32-bit builds.
+            func = getattr(libc, "fallocate64", None) or libc.fallocate
+            func.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+            func.restype = ctypes.c_int
+            _fallocate = func
+        except (AttributeError, OSError, TypeError):
+            _fallocate = False
+    return _fallocate
+
+
+def fallocate(fd, mode, offset, length):
+    func = _libc_fallocate()
+    if not func:
+        raise OSError(errno.ENOSYS, "fallocate is not available")
+    if func(fd, mode, offset, length) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def _block_ioctl(fd, request, offset, length):
+    import fcntl
+    fcntl.ioctl(fd, request, struct.pack("QQ", offset, length))
+
+
+def is_block_device(fd):
+    return stat.S_ISBLK(os.fstat(fd).st_mode)
+
+
+def _mechanisms(fd, kind):
+    if kind == "zero":
+        if is_block_device(fd):
+            return [("blkzeroout", lambda o, n: _block_ioctl(fd, BLKZEROOUT, o, n))]
+        return [
+            ("fallocate-zero-range",
+             lambda o, n: fallocate(fd, FALLOC_FL_ZERO_RANGE | FALLOC_FL_KEEP_SIZE, o, n)),
+            ("fallocate-punch-hole",
+             lambda o, n: fallocate(fd, FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE, o, n)),
+        ]
+    if is_block_device(fd):
+        return [
+            ("blksecdiscard", lambda o, n: _block_ioctl(fd, BLKSECDISCARD, o, n)),
+            ("blkdiscard", lambda o, n: _block_ioctl(fd, BLKDISCARD, o, n)),
+        ]
+    return [("fallocate-punch-hole",
+             lambda o, n: fallocate(fd, FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE, o, n))]
+
+
+def _offload(fd, kind, extents, progress=None):
+    if not extents:
+        return None
+    total = sum(end - start for start, end in extents)
+    for name, call in _mechanisms(fd, kind):
+        done = 0
+        try:
+            for start, end in extents:
+                pos = start
+                while pos < end:
+                    n = min(OFFLOAD_STEP, end - pos)
+                    call(pos, n)
+                    pos += n
+                    done += n
+                    if progress:
+                        progress(done, total)
+            return name
+        except OSError as e:
+            # Only a refusal on the very first call means "not supported";
+            # a failure part way through is a real I/O error.
+            if done or e.errno not in _UNSUPPORTED:
+                raise
+    return None
+
+
+def zero_extents(fd, extents, progress=None):
+    """Have the kernel zero every ``(start, end)`` range of ``fd``.
+
+    ``progress(done, total)`` is called after each step. Returns the mechanism
+    used, or None if nothing was done because it is unsupported.
+    """
+    return _offload(fd, "zero", extents, progress)
+
+
+def discard_extents(fd, extents, progress=None):
+    """Release ``extents`` of ``fd`` to the device (secure discard where offered)
+    or, for files, the filesystem. Returns the mechanism used, or None."""
+    return _offload(fd, "discard", extents, progress)
@@ -0,0 +1,198 @@
+import os
+import math
+import mmap
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+BUFFER_ALIGNMENT = mmap.PAGESIZE
+
+# Extra room behind the chunk so patterns can start mid-period (or mid AES block)
+# and AES update_into() has the block_size - 1 bytes of headroom it requires.
+PATTERN_SLACK = 4096
+
+_AES_BLOCK = 16
+
+
+def align_up(value, alignment=BUFFER_ALIGNMENT):
+    return (value + alignment - 1) // alignment * alignment
+
+
+def aligned_buffer(size):
+    """Return a zero-filled, page-aligned writable buffer of at least ``size`` bytes."""
+    # Anonymous mappings are always page aligned, which is what O_DIRECT needs.
+    return mmap.mmap(-1, align_up(max(size, 1)))
+
+
+def pwrite_all(fd, data, offset, metrics=None):
+    """Write all of ``data`` at ``offset``, retrying short writes.
+
+    Each retry is counted on ``metrics`` (a WipeMetrics) when given.
+    """
+    view = memoryview(data)
+    written = 0
+    try:
+        while written < len(view):
+            with view[written:] as rest:
+                if hasattr(os, "pwrite"):
+                    n = os.pwrite(fd, rest, offset + written)
+                else:
+                    os.lseek(fd, offset + written, os.SEEK_SET)
+                    n = os.write(fd, rest)
+            if n <= 0:
+                raise OSError(f"short write at offset {offset + written}")
+            written += n
+            if metrics is not None and written < len(view):
+                metrics.retry(f"short write at offset {offset + written}")
+    finally:
+        # A traceback keeps this frame alive; a live view would stop the
+        # caller's mmap buffer from closing and mask the write error.
+        view.release()
+    return written
+
+
+def pread_into(fd, buf, offset):
+    """Read up to ``len(buf)`` bytes at ``offset`` into ``buf``; returns the count."""
+    if hasattr(os, "preadv"):
+        return os.preadv(fd, [buf], offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    data = os.read(fd, len(buf))
+    buf[:len(data)] = data
+    return len(data)
+
+
+class RandomPattern:
+    """AES-256-CTR keystream addressed by byte offset.
+
+    The same key and nonce regenerate the exact bytes for any offset, so a pass
+    can be verified, resumed or split across workers without storing its data.
+    """
+
+    name = "random"
+
+    def __init__(self, key=None, nonce=None):
+        self.key = key or os.urandom(32)
+        self.nonce = nonce or os.urandom(_AES_BLOCK)
+        self._zeros = b""
+
+    def prepare(self, buf, chunk_size):
+        if len(self._zeros) < chunk_size + _AES_BLOCK:
+            self._zeros = bytes(chunk_size + _AES_BLOCK)
+
+    def fill(self, buf, offset, length):
+        # Imported here so importing the wipe modules stays cheap.
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        skip = offset % _AES_BLOCK
+        counter = (int.from_bytes(self.nonce, "big") + offset // _AES_BLOCK) % (1 << 128)
+        encryptor = Cipher(
+            algorithms.AES(self.key), modes.CTR(counter.to_bytes(_AES_BLOCK, "big"))
+        ).encryptor()
+        view = memoryview(buf)
+        encryptor.update_into(memoryview(self._zeros)[:skip + length], view)
+        return view[skip:skip + length]
+
+
+class ZeroPattern:
+    name = "zero"
+
+    def prepare(self, buf, chunk_size):
+        buf[:chunk_size] = bytes(chunk_size)
+
+    def fill(self, buf, offset, length):
+        return memoryview(buf)[:length]
+
+
+class FixedPattern:
+    """A repeating byte pattern, tiled into the buffer once per pass.
+
+    Every chunk is a view from the start of that buffer, so no data is
+    generated while writing and O_DIRECT writes stay aligned. Chunks that
+    are a multiple of ``period`` (see chunk_length) keep the phase; a
+    write at another phase re-tiles the buffer first.
+    """
+
+    def __init__(self, data, name=None):
+        if not 0 < len(data) <= PATTERN_SLACK:
+            raise ValueError(f"pattern length must be 1..{PATTERN_SLACK} bytes")
+        self.data = bytes(data)
+        self.period = len(self.data)
+        self.name = name or f"0x{self.data.hex()}"
+
+    def _tile(self, buf, phase, total):
+        view = memoryview(buf)
+        head = self.data[phase:] + self.data[:phase]
+        view[:self.period] = head
+        filled = self.period
+        # Double the tiled prefix until ``total`` bytes are covered.
+        while filled < total:
+            n = min(filled, total - filled)
+            view[filled:filled + n] = view[:n]
+            filled += n
+        view.release()
+
+    def prepare(self, buf, chunk_size):
+        self._tile(buf, 0, chunk_size + self.period)
+
+    def fill(self, buf, offset, length):
+        phase = offset % self.period
+        head = self.data[phase:] + self.data[:phase]
+        if buf[:self.period] != head:
+            self._tile(buf, phase, max(length, self.period))
+        return memoryview(buf)[:length]
+
+
+def chunk_length(pattern, chunk_size):
+    """The largest write size up to ``chunk_size`` after which ``pattern`` is
+    back at the same phase and the buffer still aligned for O_DIRECT."""
+    step = math.lcm(getattr(pattern, "period", 1), BUFFER_ALIGNMENT)
+    return chunk_size // step * step or chunk_size
+
+
+class Overwriter:
+    """Streams a pattern over a file descriptor through one reusable aligned buffer.
+
+    Peak memory is bounded by ``chunk_size`` no matter how large the target is.
+    Retries and fsync latencies are recorded on ``metrics`` when it is set.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, metrics=None):
+        self.chunk_size = align_up(chunk_size)
+        self.buffer = aligned_buffer(self.chunk_size + PATTERN_SLACK)
+        self.metrics = metrics
+
+    def sync(self, fd):
+        if self.metrics is not None:
+            self.metrics.fsync(fd)
+        else:
+            os.fsync(fd)
+
+    def run_pass(self, fd, pattern, length, offset=0, progress=None, sync_interval=None, on_sync=None):
+        """Write ``length`` bytes of ``pattern`` at ``offset``.
+
+        With ``sync_interval`` set, the descriptor is fsynced every time that many
+        bytes have been written, and ``on_sync(bytes_done)`` is called after each
+        of those fsyncs; the caller is responsible for the final fsync.
+        """
+        pattern.prepare(self.buffer, self.chunk_size)
+        step = chunk_length(pattern, self.chunk_size)
+        done = 0
+        synced = 0
+        while done < length:
+            n = min(step, length - done)
+            chunk = pattern.fill(self.buffer, offset + done, n)
+            try:
+                pwrite_all(fd, chunk, offset + done, self.metrics)
+            finally:
+                chunk.release()
+            done += n
+            if sync_interval and done - synced >= sync_interval:
+                self.sync(fd)
+                synced = done
+                if on_sync:
+                    on_sync(done)
+            if progress:
+                progress(done, length)
+        return done
+
+    def close(self):
+        self.buffer.close()
+
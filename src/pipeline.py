@@ -0,0 +1,82 @@
+import os
+import queue
+import hashlib
+import threading
+
+from src.overwrite import chunk_length, pread_into, pwrite_all
+
+
+def hashing_pass(fd, length, overwriter, pattern, depth=2, progress=None, extents=None):
+    """Run one overwrite pass that first reads and hashes every chunk it replaces.
+
+    Each chunk is read into one of ``depth + 1`` rotating buffers and handed to a
+    hasher thread (hashlib releases the GIL), then immediately overwritten with
+    ``pattern``. The file is therefore read exactly once and the first wipe pass
+    happens in the same sweep. Returns the SHA-256 hex digest of the original data.
+
+    With ``extents`` (sorted ``(start, end)`` data ranges) only those ranges are
+    read and overwritten; the holes between them are hashed as the zeros they
+    read as, so the digest is still that of the whole file. ``progress`` then
+    counts overwritten bytes only.
+    """
+    chunk_size = chunk_length(pattern, overwriter.chunk_size)
+    free = queue.Queue()
+    for _ in range(depth + 1):
+        free.put(bytearray(chunk_size))
+    filled = queue.Queue()
+    sha = hashlib.sha256()
+    zeros = memoryview(bytes(chunk_size))
+
+    def hasher():
+        while True:
+            item = filled.get()
+            if item is None:
+                return
+            buf, n = item
+            if buf is None:
+                # A hole: n zero bytes that were never read from disk.
+                while n > 0:
+                    sha.update(zeros[:min(n, chunk_size)])
+                    n -= chunk_size
+                continue
+            sha.update(memoryview(buf)[:n])
+            free.put(buf)
+
+    worker = threading.Thread(target=hasher, name="hashing-pass", daemon=True)
+    worker.start()
+    pattern.prepare(overwriter.buffer, overwriter.chunk_size)
+    if extents is None:
+        extents = [(0, length)]
+    total = sum(end - start for start, end in extents)
+    done = 0
+    pos = 0
+    try:
+        for start, end in extents:
+            if start > pos:
+                filled.put((None, start - pos))
+            pos = start
+            while pos < end:
+                buf = free.get()
+                n = pread_into(fd, memoryview(buf)[:min(chunk_size, end - pos)], pos)
+                if n <= 0:
+                    free.put(buf)
+                    break
+                filled.put((buf, n))
+                chunk = pattern.fill(overwriter.buffer, pos, n)
+                try:
+                    pwrite_all(fd, chunk, pos, overwriter.metrics)
+                finally:
+                    chunk.release()
+                pos += n
+                done += n
+                if progress:
+                    progress(done, total)
+            if pos < end:
+                break  # the file shrank underneath us
+        else:
+            if length > pos:
+                filled.put((None, length - pos))
+    finally:
+        filled.put(None)
+        worker.join()
+    return sha.hexdigest()
@@ -0,0 +1,97 @@
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from src.reports import ReportBatch, build_report_data, sign_report, write_json_report, write_pdf_report
+
+DEFAULT_WORKERS = 2
+
+
+def _render_single(private_key_path, report_data):
+    # Runs in a worker process; the key is parsed once per worker and cached.
+    sign_report(report_data, private_key_path)
+    return write_json_report(report_data), write_pdf_report(report_data)
+
+
+def _render_bundle(private_key_path, reports):
+    # The window is the bundle itself, so adding the last report flushes it.
+    batch = ReportBatch(private_key_path, window=len(reports), bundle=True)
+    for report_data in reports:
+        batch.add_report(report_data)
+    return batch.written
+
+
+class ReportQueue:
+    """Signs and renders wipe reports on a process pool, off the wiping thread.
+
+    ``submit()`` stamps the report (so ``deleted_at`` is the wipe time) and
+    returns a Future resolving to its ``(json_path, pdf_path)``. With
+    ``bundle_size`` set, reports are Merkle batch-signed in groups of that size
+    and each group is rendered as one multi-page certificate PDF; call
+    ``flush()`` or ``close()`` to send a partial group.
+    """
+
+    def __init__(self, private_key_path, max_workers=DEFAULT_WORKERS, bundle_size=0):
+        self.private_key_path = private_key_path
+        self.max_workers = max_workers
+        self.bundle_size = bundle_size
+        self._pool = None
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # The pool is only started on first use, keeping construction cheap.
+        if self._pool is None:
+            # The GUI and job threads are running by now, and forking a
+            # multi-threaded process can deadlock the child. Workers only need
+            # the key path and report data, so a fresh interpreter is enough.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._pool
+
+    def submit(self, file_path, file_hash, details=None, report_id=None):
+        report_data = build_report_data(file_path, file_hash, details, report_id)
+        if not self.bundle_size:
+            with self._lock:
+                return self._executor().submit(_render_single, self.private_key_path, report_data)
+        future = Future()
+        with self._lock:
+            self._pending.append((report_data, future))
+            if len(self._pending) >= self.bundle_size:
+                self._submit_bundle()
+        return future
+
+    def _submit_bundle(self):
+        items, self._pending = self._pending, []
+        if not items:
+            return
+        bundle = self._executor().submit(_render_bundle, self.private_key_path,
+                                         [report_data for report_data, _ in items])
+
+        def resolve(done):
+            error = done.exception()
+            for idx, (_, future) in enumerate(items):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[idx])
+
+        bundle.add_done_callback(resolve)
+
+    def flush(self):
+        with self._lock:
+            self._submit_bundle()
+
+    def close(self, wait=True):
+        self.flush()
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
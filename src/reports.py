@@ -1,112 +1,310 @@
 import os
 import json
+import uuid
+import hashlib
 import datetime
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.backends import default_backend
-from cryptography.exceptions import InvalidSignature
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 
-REPORTS_DIR = os.path.join(os.getcwd(), "reports")
-os.makedirs(REPORTS_DIR, exist_ok=True)
+from src.signers import (
+    DEFAULT_ALGORITHM, load_private_key, load_public_key, signer_for_algorithm, signer_for_key
+)
 
+REPORTS_DIR = os.path.join(os.getcwd(), "reports")
 
-def load_private_key(path):
-    with open(path, "rb") as key_file:
-        private_key = serialization.load_pem_private_key(
-            key_file.read(),
-            password=None,
-            backend=default_backend()
-        )
-    return private_key
+# Parts of a wipe_file_detailed result that go into (and are signed with) the report.
+REPORT_DETAIL_KEYS = ("wipe_method", "verification", "extents", "metrics")
 
 
-def load_public_key(path):
-    with open(path, "rb") as key_file:
-        public_key = serialization.load_pem_public_key(
-            key_file.read(),
-            backend=default_backend()
-        )
-    return public_key
+def ensure_reports_dir():
+    # Created on first write rather than at import time.
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    return REPORTS_DIR
 
 
 def sign_data(private_key, data: bytes) -> bytes:
-    signature = private_key.sign(
-        data,
-        padding.PSS(
-            mgf=padding.MGF1(hashes.SHA256()),
-            salt_length=padding.PSS.MAX_LENGTH
-        ),
-        hashes.SHA256()
-    )
-    return signature
-
-
-def verify_signature(public_key, signature: bytes, data: bytes) -> bool:
-    try:
-        public_key.verify(
-            signature,
-            data,
-            padding.PSS(
-              mgf=padding.MGF1(hashes.SHA256()),
-              salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
-        return True
-    except InvalidSignature:
+    return signer_for_key(private_key).sign(private_key, data)
+
+
+def verify_signature(public_key, signature: bytes, data: bytes, algorithm=None) -> bool:
+    # Dispatch on the algorithm recorded in the report, else on the key type.
+    signer = signer_for_algorithm(algorithm) if algorithm else signer_for_key(public_key)
+    if not isinstance(public_key, signer.key_types()):
         return False
+    return signer.verify(public_key, signature, data)
 
 
-def generate_report(file_path, file_hash, private_key_path, public_key_path):
-    # Prepare report metadata
+def new_report_id():
+    return uuid.uuid4().hex[:16]
+
+
+def build_report_data(file_path, file_hash, details=None, report_id=None):
     filename = os.path.basename(file_path)
     timestamp = datetime.datetime.utcnow().isoformat() + "Z"
     report_data = {
         "file_name": filename,
         "file_hash": file_hash,
         "deleted_at": timestamp,
+        # Names the report files: many wiped files share a basename.
+        "report_id": report_id or new_report_id(),
     }
+    # Extra wipe details (e.g. verification results) are covered by the signature
+    if details:
+        report_data.update(details)
+    return report_data
 
-    # Load private key and sign the file hash JSON string
-    private_key = load_private_key(private_key_path)
-    report_json_bytes = json.dumps(report_data, indent=4).encode("utf-8")
 
-    signature = sign_data(private_key, report_json_bytes)
-    signature_hex = signature.hex()
+def report_details(wipe_result):
+    return {key: wipe_result[key] for key in REPORT_DETAIL_KEYS if key in wipe_result}
+
+
+def report_paths(file_name, report_id=None):
+    """Where the JSON and PDF reports for ``file_name`` are (or will be) written.
+
+    Reports from before ``report_id`` existed are named by file name alone.
+    """
+    name = f"{file_name}_{report_id}" if report_id else file_name
+    return (os.path.join(REPORTS_DIR, f"{name}_wipe_report.json"),
+            os.path.join(REPORTS_DIR, f"{name}_wipe_report.pdf"))
 
-    # Add signature to report data
-    report_data["signature"] = signature_hex
 
-    # Save JSON report
-    json_report_path = os.path.join(REPORTS_DIR, f"{filename}_wipe_report.json")
+def write_json_report(report_data):
+    ensure_reports_dir()
+    json_report_path = report_paths(report_data['file_name'], report_data.get('report_id'))[0]
     with open(json_report_path, "w") as f:
         json.dump(report_data, f, indent=4)
+    return json_report_path
 
-    # Generate PDF report
-    pdf_report_path = os.path.join(REPORTS_DIR, f"{filename}_wipe_report.pdf")
-    c = canvas.Canvas(pdf_report_path, pagesize=letter)
-    width, height = letter
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawCentredString(width / 2, height - 50, "Secure Wipe Report")
 
-    c.setFont("Helvetica", 12)
+def report_lines(report_data):
     lines = [
         f"File Name: {report_data['file_name']}",
         f"File SHA256 Hash: {report_data['file_hash']}",
         f"Deleted At (UTC): {report_data['deleted_at']}",
-        "",
-        "SHA256 Hash Signature (hex):",
-        signature_hex,
     ]
+    wipe_method = report_data.get("wipe_method")
+    if wipe_method:
+        lines.append(f"Method: {wipe_method['name']} ({len(wipe_method['passes'])} passes)")
+    verification = report_data.get("verification")
+    if verification:
+        lines.append(f"Verification ({verification['mode']}): "
+                     f"{'PASSED' if verification['passed'] else 'FAILED'}, "
+                     f"{len(verification['mismatches'])} mismatching range(s)")
+    extents = report_data.get("extents")
+    if extents:
+        lines.append(f"Allocated: {extents['allocated']} of {extents['size']} bytes "
+                     f"in {len(extents['map'])} extent(s)")
+    metrics = report_data.get("metrics")
+    if metrics:
+        lines.append("")
+        for p in metrics["passes"]:
+            rate = f", {p['throughput_mb_s']} MB/s" if p["throughput_mb_s"] is not None else ""
+            lines.append(f"Pass {p['pass']} ({p['pattern']}, {p.get('mechanism', 'write')}): "
+                         f"{p['seconds']:.2f}s{rate}")
+        fsync = metrics["fsync"]
+        lines.append(f"fsync: {fsync['count']} call(s), max {fsync['max_seconds'] * 1000:.1f} ms; "
+                     f"retries: {metrics['retries']}; errors: {len(metrics['errors'])}")
+        for r in metrics.get("resumptions", []):
+            lines.append(f"Resumed at {r['resumed_at']}: pass {r['pass'] + 1}, offset {r['offset']}")
+    batch = report_data.get("batch")
+    if batch:
+        lines += [
+            "",
+            f"Batch signed: report {batch['index'] + 1} of {batch['size']}",
+            "Merkle Root (SHA256):",
+            batch["root"],
+            f"Root Signature ({batch.get('algorithm', DEFAULT_ALGORITHM)}, hex):",
+            batch["signature"],
+        ]
+    else:
+        lines += [
+            "",
+            f"Signature ({report_data.get('signature_algorithm', DEFAULT_ALGORITHM)}, hex):",
+            report_data["signature"],
+        ]
+    return lines
+
+
+def _draw_report_page(c, report_data):
+    from reportlab.lib.pagesizes import letter
+    width, height = letter
 
+    c.setFont("Helvetica-Bold", 16)
+    c.drawCentredString(width / 2, height - 50, "Secure Wipe Report")
+
+    c.setFont("Helvetica", 12)
     y = height - 100
-    for line in lines:
+    for line in report_lines(report_data):
         c.drawString(50, y, line)
         y -= 18
 
+
+def write_pdf_report(report_data):
+    # reportlab is only imported once a PDF is actually rendered
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    ensure_reports_dir()
+    pdf_report_path = report_paths(report_data['file_name'], report_data.get('report_id'))[1]
+    c = canvas.Canvas(pdf_report_path, pagesize=letter)
+    _draw_report_page(c, report_data)
     c.save()
+    return pdf_report_path
+
+
+def write_pdf_bundle(reports, pdf_report_path):
+    """Render one certificate page per report into a single PDF."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    ensure_reports_dir()
+    c = canvas.Canvas(pdf_report_path, pagesize=letter)
+    for report_data in reports:
+        _draw_report_page(c, report_data)
+        c.showPage()
+    c.save()
+    return pdf_report_path
+
+
+def sign_report(report_data, private_key_path):
+    # Load private key (cached per process) and sign the report JSON string
+    private_key = load_private_key(private_key_path)
+    report_data["signature_algorithm"] = signer_for_key(private_key).algorithm
+    report_json_bytes = json.dumps(report_data, indent=4).encode("utf-8")
+
+    signature = sign_data(private_key, report_json_bytes)
+
+    # Add signature to report data
+    report_data["signature"] = signature.hex()
+    return report_data
+
+
+def generate_report(file_path, file_hash, private_key_path, public_key_path, details=None):
+    # Prepare report metadata
+    report_data = build_report_data(file_path, file_hash, details)
+    sign_report(report_data, private_key_path)
+    return write_json_report(report_data), write_pdf_report(report_data)
+
+
+def canonical_json(report_data):
+    return json.dumps(report_data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _leaf_hash(report_data):
+    # Domain-separated leaves and nodes prevent second-preimage tricks.
+    return hashlib.sha256(b"\x00" + canonical_json(report_data)).digest()
+
+
+def _node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def merkle_tree(leaves):
+    """Return the tree levels from the leaves up to the single root level.
+
+    An odd node at the end of a level is carried up unchanged.
+    """
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_proof(levels, index):
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"side": "left" if sibling < index else "right", "hash": level[sibling].hex()})
+        index //= 2
+    return proof
+
+
+def merkle_root_from_proof(leaf, proof):
+    node = leaf
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = _node_hash(sibling, node) if step["side"] == "left" else _node_hash(node, sibling)
+    return node
+
+
+class ReportBatch:
+    """Collects reports and signs a whole window with one signature.
+
+    Each report's canonical JSON is a Merkle leaf; only the root is signed, and
+    every report carries its inclusion proof under ``"batch"``. The private key
+    is loaded once for the lifetime of the batch. With ``bundle`` set, each
+    window is rendered as one multi-page PDF instead of one PDF per report.
+    """
+
+    def __init__(self, private_key_path, window=256, bundle=False):
+        self.private_key = load_private_key(private_key_path)
+        self.window = window
+        self.bundle = bundle
+        self.pending = []
+        self.written = []
+
+    def add(self, file_path, file_hash, details=None):
+        self.add_report(build_report_data(file_path, file_hash, details))
+
+    def add_report(self, report_data):
+        self.pending.append(report_data)
+        if len(self.pending) >= self.window:
+            self.flush()
+
+    def flush(self):
+        """Sign and write the pending reports; returns their (json, pdf) paths."""
+        if not self.pending:
+            return []
+        reports, self.pending = self.pending, []
+        levels = merkle_tree(_leaf_hash(report) for report in reports)
+        root = levels[-1][0]
+        algorithm = signer_for_key(self.private_key).algorithm
+        signature_hex = sign_data(self.private_key, root).hex()
+        for index, report_data in enumerate(reports):
+            report_data["batch"] = {
+                "root": root.hex(),
+                "signature": signature_hex,
+                "algorithm": algorithm,
+                "index": index,
+                "size": len(reports),
+                "proof": merkle_proof(levels, index),
+            }
+        if self.bundle:
+            bundle_path = os.path.join(REPORTS_DIR, f"batch_{root.hex()[:16]}_wipe_report.pdf")
+            write_pdf_bundle(reports, bundle_path)
+            paths = [(write_json_report(report_data), bundle_path) for report_data in reports]
+        else:
+            paths = [(write_json_report(report_data), write_pdf_report(report_data))
+                     for report_data in reports]
+        self.written.extend(paths)
+        return paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+def verify_batch_report(public_key, report_data):
+    """Check a batch-signed report's inclusion proof and its root signature."""
+    batch = report_data.get("batch")
+    if not batch:
+        return False
+    leaf = _leaf_hash({k: v for k, v in report_data.items() if k != "batch"})
+    root = merkle_root_from_proof(leaf, batch["proof"])
+    if root.hex() != batch["root"]:
+        return False
+    return verify_signature(public_key, bytes.fromhex(batch["signature"]), root,
+                            batch.get("algorithm", DEFAULT_ALGORITHM))
+
 
-    return json_report_path, pdf_report_path
+def verify_report(public_key, report_data):
+    """Verify a report loaded from JSON, whether it was signed alone or in a batch."""
+    if "batch" in report_data:
+        return verify_batch_report(public_key, report_data)
+    unsigned = {k: v for k, v in report_data.items() if k != "signature"}
+    signature = bytes.fromhex(report_data.get("signature", ""))
+    return verify_signature(public_key, signature, json.dumps(unsigned, indent=4).encode("utf-8"),
+                            report_data.get("signature_algorithm", DEFAULT_ALGORITHM))
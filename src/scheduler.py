@@ -0,0 +1,111 @@
+import os
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.block_wipe import DEFAULT_BLOCK_SIZE, NIST_CLEAR_PASSES, overwrite_target
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_PER_GROUP = 2
+
+_PCI_ADDRESS = re.compile(r"^[0-9a-f]{4}:[0-9a-f]{2}:[0-9a-f]{2}\.[0-9a-f]$")
+
+
+def controller_of(path, sysfs_root="/sys"):
+    """Best-effort key for the controller or bus a target sits behind.
+
+    Block devices are grouped by the nearest PCI function in their sysfs path
+    (an AHCI/HBA/USB controller, or the NVMe drive itself). Image files are
+    grouped by the device of the filesystem holding them.
+    """
+    name = os.path.basename(os.path.realpath(path))
+    link = os.path.join(sysfs_root, "class", "block", name)
+    if os.path.exists(link):
+        pci = [part for part in os.path.realpath(link).split(os.sep) if _PCI_ADDRESS.match(part)]
+        return f"pci:{pci[-1]}" if pci else f"block:{name}"
+    try:
+        return f"dev:{os.stat(path).st_dev}"
+    except OSError:
+        return f"path:{path}"
+
+
+def _wipe_one(target, group, passes, block_size, direct, progress):
+    result = {"target": target, "group": group, "ok": False, "bytes": 0}
+    start = time.monotonic()
+    try:
+        report = None
+        if progress:
+            report = lambda idx, done, total: progress(target, idx, done, total)
+        stats = overwrite_target(target, passes, block_size=block_size, direct=direct, progress=report)
+        result["ok"] = True
+        result["bytes"] = stats["size"] * len(passes)
+        result["passes"] = stats["passes"]
+    except Exception as e:
+        print(f"[scheduler] Wipe failed for {target}: {e}")
+        result["error"] = str(e)
+    result["seconds"] = round(time.monotonic() - start, 3)
+    result["throughput_mb_s"] = round(result["bytes"] / max(result["seconds"], 1e-9) / 1e6, 1)
+    return result
+
+
+def schedule_wipes(targets, passes=NIST_CLEAR_PASSES, max_workers=DEFAULT_MAX_WORKERS,
+                   max_per_group=DEFAULT_MAX_PER_GROUP, groups=None,
+                   block_size=DEFAULT_BLOCK_SIZE, direct=False, progress=None):
+    """Wipe many devices or image files concurrently, one worker per target.
+
+    At most ``max_workers`` targets run at once and at most ``max_per_group``
+    of those share a controller, so one busy bus cannot take every slot.
+    Groups are served round-robin. ``groups`` may map a target to an explicit
+    group key; otherwise controller_of() is used. ``progress(target, pass_index,
+    bytes_done, total_bytes)`` is called from worker threads.
+
+    Returns a dict with per-target results and aggregate throughput.
+    """
+    groups = groups or {}
+    pending = OrderedDict()
+    for target in targets:
+        group = groups.get(target) or controller_of(target)
+        pending.setdefault(group, deque()).append(target)
+
+    running = Counter()
+    results = []
+    futures = {}
+    start = time.monotonic()
+
+    def next_target():
+        for group in pending:
+            if running[group] < max_per_group:
+                target = pending[group].popleft()
+                if pending[group]:
+                    pending.move_to_end(group)
+                else:
+                    del pending[group]
+                return target, group
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wipe") as pool:
+        while pending or futures:
+            while len(futures) < max_workers:
+                picked = next_target()
+                if picked is None:
+                    break
+                target, group = picked
+                running[group] += 1
+                futures[pool.submit(_wipe_one, target, group, passes, block_size, direct, progress)] = group
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                running[futures.pop(future)] -= 1
+                results.append(future.result())
+
+    elapsed = time.monotonic() - start
+    total_bytes = sum(r["bytes"] for r in results)
+    order = {target: idx for idx, target in enumerate(targets)}
+    results.sort(key=lambda r: order[r["target"]])
+    return {
+        "targets": results,
+        "ok": all(r["ok"] for r in results),
+        "bytes": total_bytes,
+        "seconds": round(elapsed, 3),
+        "throughput_mb_s": round(total_bytes / max(elapsed, 1e-9) / 1e6, 1),
+    }
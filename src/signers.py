@@ -0,0 +1,106 @@
+import os
+import functools
+
+# cryptography is imported inside the functions below, on first use, so that
+# importing the report modules does not pay for it at startup.
+
+# Reports written before the algorithm was recorded were all RSA-PSS.
+DEFAULT_ALGORITHM = "rsa-pss-sha256"
+
+
+class RSAPSSSigner:
+    algorithm = "rsa-pss-sha256"
+
+    def key_types(self):
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        return (rsa.RSAPrivateKey, rsa.RSAPublicKey)
+
+    def _padding(self):
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+        return padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()),
+            salt_length=padding.PSS.MAX_LENGTH
+        )
+
+    def sign(self, private_key, data):
+        from cryptography.hazmat.primitives import hashes
+        return private_key.sign(data, self._padding(), hashes.SHA256())
+
+    def verify(self, public_key, signature, data):
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.exceptions import InvalidSignature
+        try:
+            public_key.verify(signature, data, self._padding(), hashes.SHA256())
+            return True
+        except InvalidSignature:
+            return False
+
+
+class Ed25519Signer:
+    algorithm = "ed25519"
+
+    def key_types(self):
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+        return (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)
+
+    def sign(self, private_key, data):
+        return private_key.sign(data)
+
+    def verify(self, public_key, signature, data):
+        from cryptography.exceptions import InvalidSignature
+        try:
+            public_key.verify(signature, data)
+            return True
+        except InvalidSignature:
+            return False
+
+
+SIGNERS = {signer.algorithm: signer for signer in (RSAPSSSigner(), Ed25519Signer())}
+
+
+def signer_for_key(key):
+    for signer in SIGNERS.values():
+        if isinstance(key, signer.key_types()):
+            return signer
+    raise ValueError(f"Unsupported key type: {type(key).__name__}")
+
+
+def signer_for_algorithm(algorithm):
+    try:
+        return SIGNERS[algorithm or DEFAULT_ALGORITHM]
+    except KeyError:
+        raise ValueError(f"Unsupported signature algorithm: {algorithm}") from None
+
+
+@functools.lru_cache(maxsize=None)
+def _load_private_key(path):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.backends import default_backend
+    with open(path, "rb") as key_file:
+        return serialization.load_pem_private_key(
+            key_file.read(),
+            password=None,
+            backend=default_backend()
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def _load_public_key(path):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.backends import default_backend
+    with open(path, "rb") as key_file:
+        return serialization.load_pem_public_key(
+            key_file.read(),
+            backend=default_backend()
+        )
+
+
+def load_private_key(path):
+    """Parse a PEM private key once per process; later calls reuse it."""
+    return _load_private_key(os.path.abspath(path))
+
+
+def load_public_key(path):
+    """Parse a PEM public key once per process; later calls reuse it."""
+    return _load_public_key(os.path.abspath(path))
@@ -0,0 +1,125 @@
+import os
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+from src.overwrite import DEFAULT_CHUNK_SIZE, Overwriter, align_up
+
+DEFAULT_QUEUE_DEPTH = 4
+DEFAULT_STRIPE_SIZE = 64 * 1024 * 1024
+
+# How often (seconds) the calling thread wakes to report progress and sync.
+POLL_INTERVAL = 0.1
+
+
+class _Stopped(Exception):
+    pass
+
+
+class _LockedRetries:
+    """Lets worker threads count short-write retries on a WipeMetrics, which
+    is otherwise only written by one thread."""
+
+    def __init__(self, metrics, lock):
+        self.metrics = metrics
+        self.lock = lock
+
+    def retry(self, reason):
+        with self.lock:
+            self.metrics.retry(reason)
+
+
+def stripes_for(offset, length, stripe_size):
+    """Split ``[offset, offset + length)`` into ``(start, end)`` stripes."""
+    return [(start, min(start + stripe_size, offset + length))
+            for start in range(offset, offset + length, stripe_size)]
+
+
+def striped_pass(fd, pattern, length, offset=0, chunk_size=DEFAULT_CHUNK_SIZE,
+                 queue_depth=DEFAULT_QUEUE_DEPTH, stripe_size=DEFAULT_STRIPE_SIZE,
+                 progress=None, sync_interval=None, on_sync=None, sync=None, metrics=None):
+    """Write one pass with up to ``queue_depth`` pwrites in flight.
+
+    The range is cut into ``stripe_size`` stripes which a pool of
+    ``queue_depth`` threads writes concurrently, each through its own aligned
+    buffer (pwrite releases the GIL). ``progress(done, length)`` and
+    ``on_sync(bytes_done)`` run on the calling thread; an exception raised
+    from ``progress`` stops the workers and propagates. A stripe counts as
+    done only once an fsync after its last write has returned, and
+    ``on_sync`` reports the contiguous prefix of such stripes, so it is
+    always safe to resume from. The pass returns only after a final fsync
+    has covered every stripe.
+    ``sync(fd)`` replaces os.fsync (e.g. Overwriter.sync, to time it), and
+    short-write retries in the workers are counted on ``metrics``.
+    """
+    sync = sync or os.fsync
+    stripe_size = align_up(max(stripe_size, chunk_size), chunk_size)
+    stripes = stripes_for(offset, length, stripe_size)
+    written = [0] * len(stripes)
+    complete = [False] * len(stripes)
+    synced = [False] * len(stripes)
+    lock = threading.Lock()
+    stop = threading.Event()
+    local = threading.local()
+    overwriters = []
+    retries = _LockedRetries(metrics, lock) if metrics is not None else None
+
+    def write_stripe(index):
+        overwriter = getattr(local, "overwriter", None)
+        if overwriter is None:
+            overwriter = local.overwriter = Overwriter(chunk_size, retries)
+            with lock:
+                overwriters.append(overwriter)
+        start, end = stripes[index]
+
+        def advance(done, total):
+            if stop.is_set():
+                raise _Stopped()
+            with lock:
+                written[index] = done
+
+        overwriter.run_pass(fd, pattern, end - start, start, progress=advance)
+        with lock:
+            complete[index] = True
+
+    def synced_prefix():
+        prefix = 0
+        for (start, end), done in zip(stripes, synced):
+            if not done:
+                break
+            prefix += end - start
+        return prefix
+
+    def checkpoint():
+        with lock:
+            ready = [i for i, done in enumerate(complete) if done and not synced[i]]
+        sync(fd)
+        for i in ready:
+            synced[i] = True
+        if on_sync:
+            on_sync(synced_prefix())
+
+    last_synced = 0
+    pool = ThreadPoolExecutor(max_workers=queue_depth, thread_name_prefix="striped-pass")
+    try:
+        futures = [pool.submit(write_stripe, i) for i in range(len(stripes))]
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_EXCEPTION)
+            for future in finished:
+                future.result()
+            with lock:
+                done = sum(written)
+            if sync_interval and done - last_synced >= sync_interval:
+                checkpoint()
+                last_synced = done
+            if progress:
+                progress(done, length)
+        checkpoint()
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        for overwriter in overwriters:
+            overwriter.close()
+    return length
@@ -0,0 +1,29 @@
+"""Small readers for sysfs and /proc attributes.
+
+Shared by the drive inventory and the checkpoint journal's target identity.
+"""
+import os
+
+
+def read_sysfs(path):
+    """The stripped contents of a sysfs (or /proc) attribute, or None if it
+    is missing or empty."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def disk_ids(disk):
+    """``{"wwid", "serial"}`` of the sysfs disk directory ``disk``, where known.
+
+    Most drivers put them under ``device/``; some (NVMe, virtio) on the disk
+    itself.
+    """
+    ids = {}
+    for key in ("wwid", "serial"):
+        value = read_sysfs(os.path.join(disk, "device", key)) or read_sysfs(os.path.join(disk, key))
+        if value:
+            ids[key] = value
+    return ids
@@ -0,0 +1,158 @@
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.extents import data_extents, extent_bytes
+from src.offload import zero_extents
+from src.overwrite import Overwriter, RandomPattern, ZeroPattern
+
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+TREE_CHUNK_SIZE = 1024 * 1024
+SMALL_FILE_LIMIT = 1024 * 1024
+BATCH_FILES = 256
+BATCH_BYTES = 8 * 1024 * 1024
+
+_local = threading.local()
+
+
+def _overwriter(chunk_size):
+    # One buffer per worker thread, reused for every file it handles.
+    overwriter = getattr(_local, "overwriter", None)
+    if overwriter is None or overwriter.chunk_size < chunk_size:
+        overwriter = _local.overwriter = Overwriter(chunk_size)
+    return overwriter
+
+
+def _wipe_batch(batch, passes, chunk_size):
+    """Overwrite (where requested) and unlink each ``(path, size, overwrite)`` entry."""
+    wiped = 0
+    written = 0
+    errors = []
+    for path, size, overwrite in batch:
+        try:
+            if overwrite and size:
+                overwriter = _overwriter(chunk_size)
+                fd = os.open(path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+                try:
+                    # Holes in sparse files are left alone.
+                    extents = data_extents(fd, size)
+                    for pattern in [RandomPattern() for _ in range(passes)]:
+                        for start, end in extents:
+                            overwriter.run_pass(fd, pattern, end - start, start)
+                        os.fsync(fd)
+                    # The kernel zeroes the final pass where the filesystem allows,
+                    # but only once a random pass has overwritten the data in place.
+                    if not (passes and zero_extents(fd, extents)):
+                        for start, end in extents:
+                            overwriter.run_pass(fd, ZeroPattern(), end - start, start)
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                written += extent_bytes(extents) * (passes + 1)
+            os.unlink(path)
+            wiped += 1
+        except OSError as e:
+            errors.append(f"{path}: {e}")
+    return wiped, written, errors
+
+
+def _walk(root, errors):
+    """Yield ``(path, lstat, depth)`` for every entry below ``root``.
+
+    Directories are yielded with ``lstat`` set to None. Symlinks are never
+    followed. Unreadable directories are recorded in ``errors`` and skipped.
+    """
+    stack = [(root, 0)]
+    while stack:
+        current, depth = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, depth + 1))
+                        yield entry.path, None, depth + 1
+                    else:
+                        yield entry.path, entry.stat(follow_symlinks=False), depth + 1
+        except OSError as e:
+            errors.append(f"{current}: {e}")
+
+
+def wipe_tree(root, passes=1, workers=DEFAULT_WORKERS, chunk_size=TREE_CHUNK_SIZE, overwrite=True,
+              progress=None):
+    """Securely wipe everything below ``root`` (``root`` itself is kept).
+
+    Regular files get ``passes`` random passes and a zero pass and are then
+    unlinked, from a pool of ``workers`` threads. Small files are grouped into
+    batches to keep per-task overhead low. Hard links are deduplicated by
+    inode so shared data is overwritten once; symlinks and special files are
+    only unlinked. Directories are removed deepest first once all files are
+    gone. With ``overwrite=False`` files are only unlinked.
+    ``progress(files_done, bytes_written)`` is called from the walking thread
+    each time a batch is queued; an exception raised from it stops the walk.
+
+    Returns a stats dict with counts of files, bytes written and errors.
+    """
+    seen_inodes = set()
+    dirs = []
+    stats = {"files": 0, "bytes_written": 0, "hardlinks_deduplicated": 0, "dirs": 0, "errors": []}
+    batch = []
+    batch_bytes = 0
+    # Bound the number of queued tasks so huge trees don't buffer millions of paths.
+    slots = threading.BoundedSemaphore(workers * 4)
+    lock = threading.Lock()
+
+    def collect(future):
+        try:
+            wiped, written, errors = future.result()
+            with lock:
+                stats["files"] += wiped
+                stats["bytes_written"] += written
+                stats["errors"].extend(errors)
+        except Exception as e:
+            with lock:
+                stats["errors"].append(str(e))
+        finally:
+            slots.release()
+
+    def submit(pool, tasks):
+        if progress:
+            with lock:
+                files, written = stats["files"], stats["bytes_written"]
+            progress(files, written)
+        slots.acquire()
+        pool.submit(_wipe_batch, tasks, passes, chunk_size).add_done_callback(collect)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tree-wipe") as pool:
+        for path, st, depth in _walk(root, stats["errors"]):
+            if st is None:
+                dirs.append((depth, path))
+                continue
+            wanted = overwrite and stat.S_ISREG(st.st_mode)
+            if wanted and st.st_nlink > 1:
+                key = (st.st_dev, st.st_ino)
+                if key in seen_inodes:
+                    wanted = False
+                    stats["hardlinks_deduplicated"] += 1
+                else:
+                    seen_inodes.add(key)
+            size = st.st_size if wanted else 0
+            if size >= SMALL_FILE_LIMIT:
+                submit(pool, [(path, size, wanted)])
+                continue
+            batch.append((path, size, wanted))
+            batch_bytes += size
+            if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+                submit(pool, batch)
+                batch = []
+                batch_bytes = 0
+        if batch:
+            submit(pool, batch)
+
+    for depth, path in sorted(dirs, reverse=True):
+        try:
+            os.rmdir(path)
+            stats["dirs"] += 1
+        except OSError as e:
+            stats["errors"].append(f"{path}: {e}")
+    return stats
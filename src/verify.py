@@ -0,0 +1,256 @@
+import os
+import math
+import random
+from statistics import NormalDist
+
+import numpy as np
+
+from src.overwrite import DEFAULT_CHUNK_SIZE, PATTERN_SLACK, aligned_buffer, chunk_length, pread_into
+
+DEFAULT_BLOCK_SIZE = 4096
+DEFAULT_DEFECT_RATE = 0.001
+DEFAULT_CONFIDENCE = 0.99
+DEFAULT_ALPHA = 1e-6
+MAX_REPORTED_FAILURES = 100
+DEFAULT_VERIFY_WINDOW = 64 * 1024 * 1024
+MISMATCH_GRANULARITY = 4096
+
+
+def _log_choose(n, k):
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def confidence_for_samples(samples, total_blocks, defect_rate=DEFAULT_DEFECT_RATE):
+    """Confidence that fewer than ``defect_rate`` of all blocks are bad, given
+    ``samples`` clean blocks drawn without replacement (hypergeometric)."""
+    bad = max(1, math.ceil(defect_rate * total_blocks))
+    if samples + bad > total_blocks:
+        return 1.0
+    miss = _log_choose(total_blocks - bad, samples) - _log_choose(total_blocks, samples)
+    return 1.0 - math.exp(miss)
+
+
+def samples_for_confidence(confidence, total_blocks, defect_rate=DEFAULT_DEFECT_RATE):
+    """Smallest sample count reaching ``confidence`` for the given defect rate."""
+    lo, hi = 1, max(1, total_blocks)
+    if confidence_for_samples(hi, total_blocks, defect_rate) < confidence:
+        return hi
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if confidence_for_samples(mid, total_blocks, defect_rate) >= confidence:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def chi2_upper_bound(dof, alpha):
+    """Upper critical chi-square value (Wilson-Hilferty approximation)."""
+    z = NormalDist().inv_cdf(1 - alpha)
+    h = 2 / (9 * dof)
+    return dof * (1 - h + z * math.sqrt(h)) ** 3
+
+
+def sample_offsets(size, block_size, samples, seed=None):
+    """Pick ``samples`` distinct block-aligned offsets, sorted for sequential reads."""
+    total_blocks = size // block_size
+    picked = random.Random(seed).sample(range(total_blocks), min(samples, total_blocks))
+    picked.sort()
+    return np.asarray(picked, dtype=np.int64) * block_size
+
+
+def read_blocks(fd, offsets, block_size):
+    """Read every block at ``offsets`` into one (n, block_size) uint8 array."""
+    blocks = np.empty((len(offsets), block_size), dtype=np.uint8)
+    for row, offset in enumerate(offsets):
+        pread_into(fd, blocks[row], int(offset))
+    return blocks
+
+
+def byte_histograms(blocks):
+    rows = len(blocks)
+    index = blocks.astype(np.int64) + (np.arange(rows, dtype=np.int64) * 256)[:, None]
+    return np.bincount(index.ravel(), minlength=rows * 256).reshape(rows, 256)
+
+
+def check_pattern(blocks, offsets, pattern):
+    """Return a boolean mask of blocks that do not match the repeating ``pattern``."""
+    period = len(pattern)
+    block_size = blocks.shape[1]
+    tiled = np.frombuffer(pattern * (block_size // period + 2), dtype=np.uint8)
+    if period == 1:
+        return np.any(blocks != tiled[0], axis=1)
+    phases = (offsets % period).astype(np.int64)
+    expected = tiled[phases[:, None] + np.arange(block_size)]
+    return np.any(blocks != expected, axis=1)
+
+
+def check_random(blocks, alpha=DEFAULT_ALPHA):
+    """Return ``(bad_mask, chi2, entropy)`` for blocks expected to look random."""
+    counts = byte_histograms(blocks)
+    expected = blocks.shape[1] / 256
+    chi2 = ((counts - expected) ** 2 / expected).sum(axis=1)
+    p = counts / blocks.shape[1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.where(p > 0, p * np.log2(p), 0.0).sum(axis=1)
+    return chi2 > chi2_upper_bound(255, alpha), chi2, entropy
+
+
+def verify_sampled(target, expected="random", samples=None, confidence=DEFAULT_CONFIDENCE,
+                   block_size=DEFAULT_BLOCK_SIZE, defect_rate=DEFAULT_DEFECT_RATE,
+                   alpha=DEFAULT_ALPHA, seed=None):
+    """Check randomly sampled blocks of a wiped device or file.
+
+    ``expected`` is ``"random"``, ``"zero"`` or a bytes pattern. Pass an explicit
+    ``samples`` budget, or leave it as None to draw as many blocks as needed to
+    reach ``confidence`` that at most ``defect_rate`` of the blocks were missed.
+    Only whole blocks are sampled.
+
+    Returns a dict with the verdict, failing offsets and the confidence reached.
+    """
+    fd = os.open(target, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        block_size = min(block_size, size) or 1
+        total_blocks = size // block_size
+        if samples is None:
+            samples = samples_for_confidence(confidence, total_blocks, defect_rate)
+        offsets = sample_offsets(size, block_size, samples, seed)
+        blocks = read_blocks(fd, offsets, block_size)
+    finally:
+        os.close(fd)
+
+    result = {
+        "target": target,
+        "expected": expected if isinstance(expected, str) else expected.hex(),
+        "size": size,
+        "block_size": block_size,
+        "samples": len(offsets),
+        "defect_rate": defect_rate,
+    }
+    if expected == "random":
+        bad, chi2, entropy = check_random(blocks, alpha)
+        result["mean_entropy"] = round(float(entropy.mean()), 4) if len(entropy) else None
+        result["max_chi2"] = round(float(chi2.max()), 2) if len(chi2) else None
+    else:
+        pattern = b"\x00" if expected == "zero" else bytes(expected)
+        bad = check_pattern(blocks, offsets, pattern)
+
+    failed = offsets[bad]
+    result["failed_blocks"] = int(len(failed))
+    result["failed_offsets"] = [int(o) for o in failed[:MAX_REPORTED_FAILURES]]
+    result["passed"] = not len(failed)
+    result["confidence"] = round(confidence_for_samples(len(offsets), total_blocks, defect_rate), 6) \
+        if total_blocks else 0.0
+    return result
+
+
+def _drop_cache(fd, offset, length):
+    # Clean pages are dropped so the read-back comes from the device, not RAM.
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _diff_ranges(got, expected, offset, granularity=MISMATCH_GRANULARITY):
+    diff = np.flatnonzero(np.frombuffer(got, dtype=np.uint8) != np.frombuffer(expected, dtype=np.uint8))
+    return [(offset + int(b) * granularity, offset + min((int(b) + 1) * granularity, len(got)))
+            for b in np.unique(diff // granularity)]
+
+
+class StreamingVerifier:
+    """Compares a written range against its regenerated pattern, chunk by chunk.
+
+    Only two chunk-sized buffers are held (read-back and expected), however
+    large the range is.
+    """
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.read_buffer = aligned_buffer(chunk_size)
+        self.expect_buffer = aligned_buffer(chunk_size + PATTERN_SLACK)
+
+    def compare_range(self, fd, pattern, offset, length):
+        """Return the ``(start, end)`` ranges whose contents differ from ``pattern``."""
+        pattern.prepare(self.expect_buffer, self.chunk_size)
+        step = chunk_length(pattern, self.chunk_size)
+        ranges = []
+        done = 0
+        while done < length:
+            n = min(step, length - done)
+            pos = offset + done
+            got = memoryview(self.read_buffer)[:n]
+            expected = None
+            try:
+                read = pread_into(fd, got, pos)
+                expected = pattern.fill(self.expect_buffer, pos, n)
+                if read < n:
+                    ranges.append((pos + read, pos + n))
+                if not np.array_equal(np.frombuffer(got[:read], dtype=np.uint8),
+                                      np.frombuffer(expected[:read], dtype=np.uint8)):
+                    ranges.extend(_diff_ranges(got[:read], expected[:read], pos))
+            finally:
+                # Views left in a traceback would keep close() from unmapping.
+                got.release()
+                if expected is not None:
+                    expected.release()
+            done += n
+        return ranges
+
+    def close(self):
+        self.read_buffer.close()
+        self.expect_buffer.close()
+
+
+def check_written(fd, pattern, offset, length, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Read back a range that was already written (e.g. zeroed by the kernel)
+    and return the merged ``[start, end)`` ranges that differ from ``pattern``."""
+    _drop_cache(fd, offset, length)
+    verifier = StreamingVerifier(chunk_size)
+    try:
+        return merge_ranges(verifier.compare_range(fd, pattern, offset, length))
+    finally:
+        verifier.close()
+
+
+def verified_pass(overwriter, fd, pattern, length, offset=0, read_fd=None,
+                  window=DEFAULT_VERIFY_WINDOW, progress=None, on_sync=None):
+    """Write one pass and read every window back right after it is fsynced.
+
+    The expected bytes are regenerated from ``pattern`` (keystreams are offset
+    addressable), so nothing written is kept in memory. ``read_fd`` lets an
+    O_DIRECT writer be checked through a separate descriptor.
+    ``on_sync(bytes_done, mismatches)`` is called after each window has been
+    fsynced and checked, with that window's mismatching ranges.
+    Returns the merged list of ``[start, end)`` ranges that did not match.
+    """
+    read_fd = fd if read_fd is None else read_fd
+    verifier = StreamingVerifier(overwriter.chunk_size)
+    mismatches = []
+    done = 0
+    try:
+        while done < length:
+            n = min(window, length - done)
+            report = None
+            if progress:
+                report = lambda d, total, base=done: progress(base + d, length)
+            overwriter.run_pass(fd, pattern, n, offset + done, progress=report)
+            overwriter.sync(fd)
+            _drop_cache(read_fd, offset + done, n)
+            found = verifier.compare_range(read_fd, pattern, offset + done, n)
+            mismatches.extend(found)
+            done += n
+            if on_sync:
+                on_sync(done, found)
+    finally:
+        verifier.close()
+    return merge_ranges(mismatches)
@@ -0,0 +1,225 @@
+"""Bulk verification of signed JSON wipe reports.
+
+Usage: python -m src.verify_reports PATH [PATH ...] --public-key PEM
+                                    [--public-key PEM ...] [--jobs N] [--summary FILE]
+
+Each PATH is a directory (searched recursively for ``*.json``), a single
+report, or a .zip / .tar(.gz) archive of reports. Reports are checked on a
+process pool; every worker parses the public keys once. Each report is
+classified as:
+
+- ``valid``: the signature (or batch inclusion proof and root signature)
+  matches the report as written.
+- ``tampered``: the report is well formed but its contents no longer match
+  the signature.
+- ``missing-key``: none of the given public keys is of the type the report
+  was signed with, so it cannot be checked.
+- ``invalid``: not a JSON object, no signature, or a malformed signature
+  or algorithm field.
+"""
+import os
+import sys
+import json
+import zlib
+import tarfile
+import zipfile
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.reports import verify_report
+from src.signers import DEFAULT_ALGORITHM, load_public_key, signer_for_algorithm
+
+VALID = "valid"
+INVALID = "invalid"
+TAMPERED = "tampered"
+MISSING_KEY = "missing-key"
+STATUSES = (VALID, INVALID, TAMPERED, MISSING_KEY)
+
+DEFAULT_JOBS = os.cpu_count() or 1
+# Reports handed to a worker per round trip; keeps IPC off the hot path.
+CHUNK_SIZE = 64
+# Chunks queued per worker. Bounds how much of an archive is held in memory.
+CHUNKS_IN_FLIGHT = 2
+
+# Public keys of the current process, parsed once by _init_worker.
+_keys = ()
+
+
+def _init_worker(public_key_paths):
+    global _keys
+    _keys = tuple(load_public_key(path) for path in public_key_paths)
+
+
+def classify_report(report_data, public_keys):
+    """Return ``(status, detail)`` for one parsed report (see the module docstring)."""
+    if not isinstance(report_data, dict):
+        return INVALID, "not a JSON object"
+    batch = report_data.get("batch")
+    if batch is not None:
+        if not isinstance(batch, dict) or "signature" not in batch or "proof" not in batch:
+            return INVALID, "incomplete batch signature"
+        algorithm = batch.get("algorithm", DEFAULT_ALGORITHM)
+    elif "signature" not in report_data:
+        return INVALID, "no signature"
+    else:
+        algorithm = report_data.get("signature_algorithm", DEFAULT_ALGORITHM)
+    try:
+        signer = signer_for_algorithm(algorithm)
+    except ValueError as e:
+        return INVALID, str(e)
+    keys = [key for key in public_keys if isinstance(key, signer.key_types())]
+    if not keys:
+        return MISSING_KEY, f"no {signer.algorithm} public key given"
+    try:
+        if any(verify_report(key, report_data) for key in keys):
+            return VALID, None
+    except (ValueError, TypeError, KeyError) as e:
+        # Malformed hex, proof steps or field types.
+        return INVALID, f"malformed signature: {e}"
+    return TAMPERED, "signature does not match the report"
+
+
+def _check(item):
+    # Runs in a worker process; item is (name, path), (name, raw bytes) or
+    # (name, the error that made it unreadable).
+    name, source = item
+    try:
+        if isinstance(source, Exception):
+            raise source
+        if isinstance(source, bytes):
+            report_data = json.loads(source)
+        else:
+            with open(source, 'rb') as f:
+                report_data = json.load(f)
+    except (OSError, ValueError) as e:
+        return name, INVALID, f"unreadable: {e}"
+    status, detail = classify_report(report_data, _keys)
+    return name, status, detail
+
+
+def _check_chunk(items):
+    return [_check(item) for item in items]
+
+
+def _archive_items(path):
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(".json"):
+                    yield f"{path}:{info.filename}", archive.read(info)
+    else:
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith(".json"):
+                    yield f"{path}:{member.name}", archive.extractfile(member).read()
+
+
+def _is_archive(path):
+    return zipfile.is_zipfile(path) or (not path.endswith(".json") and tarfile.is_tarfile(path))
+
+
+def report_items(paths):
+    """Yield ``(name, source)`` for every report under ``paths``.
+
+    ``source`` is a file path for loose reports and the raw bytes for archive
+    members, so workers never need to open the archive themselves. A path
+    that cannot be read, or an archive that turns out corrupt, is yielded
+    with the error as its source and counted as invalid.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file_name in sorted(files):
+                    if file_name.endswith(".json"):
+                        full_path = os.path.join(root, file_name)
+                        yield full_path, full_path
+            continue
+        try:
+            if not _is_archive(path):
+                yield path, path
+                continue
+            yield from _archive_items(path)
+        except (OSError, EOFError, zlib.error, tarfile.TarError, zipfile.BadZipFile) as e:
+            # Truncated compressed archives end in EOFError or zlib.error.
+            yield path, OSError(f"{type(e).__name__}: {e}")
+
+
+def _pooled_results(pool, items, jobs):
+    """Like ``pool.map(_check, items)``, but with only a few chunks in
+    flight, so huge archives are not read into memory ahead of the workers."""
+    chunks = iter(lambda: list(itertools.islice(items, CHUNK_SIZE)), [])
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(_check_chunk, chunk))
+        if len(pending) >= jobs * CHUNKS_IN_FLIGHT:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def verify_reports(paths, public_key_paths, jobs=DEFAULT_JOBS, on_result=None):
+    """Verify every report under ``paths``; returns the summary dict.
+
+    ``on_result(name, status, detail)`` is called as each report is checked.
+    The summary holds the count per status and the name and reason of every
+    report that is not valid.
+    """
+    summary = {"total": 0, "counts": dict.fromkeys(STATUSES, 0), "failures": []}
+    items = report_items(paths)
+    if jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(tuple(public_key_paths),))
+        results = _pooled_results(pool, items, jobs)
+    else:
+        pool = None
+        _init_worker(public_key_paths)
+        results = map(_check, items)
+    try:
+        for name, status, detail in results:
+            summary["total"] += 1
+            summary["counts"][status] += 1
+            if status != VALID:
+                summary["failures"].append({"report": name, "status": status, "detail": detail})
+            if on_result:
+                on_result(name, status, detail)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify signed wipe reports in bulk.")
+    parser.add_argument("paths", nargs="+", help="report files, directories or .zip/.tar archives")
+    parser.add_argument("--public-key", action="append", required=True,
+                        help="PEM public key (repeat for reports signed with several keys)")
+    parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS, help="worker processes")
+    parser.add_argument("--summary", help="write the JSON summary here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        # Fail early on a bad key rather than once per worker.
+        for path in args.public_key:
+            load_public_key(path)
+    except (OSError, ValueError) as e:
+        print(f"[verify_reports] Cannot load public key: {e}", file=sys.stderr)
+        return 2
+
+    summary = verify_reports(args.paths, args.public_key, jobs=max(1, args.jobs))
+    text = json.dumps(summary, indent=4)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    counts = summary["counts"]
+    print(f"[verify_reports] {counts[VALID]}/{summary['total']} valid, {counts[TAMPERED]} tampered, "
+          f"{counts[INVALID]} invalid, {counts[MISSING_KEY]} missing key", file=sys.stderr)
+    return 0 if summary["total"] and counts[VALID] == summary["total"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,33 @@
 from src.wipe_utils import wipe_file as wipe_utils_file
+from src.wipe_utils import hash_and_wipe_file as wipe_utils_hash_and_wipe_file
+from src.wipe_utils import wipe_file_detailed as wipe_utils_file_detailed
 from src.wipe_utils import wipe_partition as wipe_utils_partition
 from src.wipe_utils import wipe_os as wipe_utils_os
+from src.scheduler import schedule_wipes
 
 def wipe_file(file_path):
     return wipe_utils_file(file_path)
 
+def hash_and_wipe_file(file_path):
+    return wipe_utils_hash_and_wipe_file(file_path)
+
+def wipe_file_detailed(file_path, verify=False):
+    return wipe_utils_file_detailed(file_path, verify=verify)
+
 def wipe_partition(partition_path):
     return wipe_utils_partition(partition_path)
 
 def wipe_os():
     return wipe_utils_os()
+
+def wipe_devices(targets, max_workers=4):
+    return schedule_wipes(targets, max_workers=max_workers)
+
+def verify_wipe(target, expected=None, samples=None, wipe_method="nist-clear"):
+    """Sample ``target`` for what ``wipe_method``'s last pass left, unless
+    ``expected`` says otherwise."""
+    from src.methods import get_method
+    from src.verify import verify_sampled
+    if expected is None:
+        expected = get_method(wipe_method).expected
+    return verify_sampled(target, expected=expected, samples=samples)
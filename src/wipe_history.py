@@ -1,26 +1,131 @@
 import os
 import json
+import sqlite3
+import threading
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ui'))
 REPORTS_DIR = os.path.join(BASE_DIR, "reports")
-os.makedirs(REPORTS_DIR, exist_ok=True)
 
+# Legacy single-document history, imported once into the SQLite store.
 HISTORY_FILE = os.path.join(REPORTS_DIR, "wipe_history.json")
+HISTORY_DB = os.path.join(REPORTS_DIR, "wipe_history.db")
 
-def save_wipe_record(record):
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    hash_key TEXT NOT NULL,
+    deleted_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_hash ON records (hash_key);
+CREATE INDEX IF NOT EXISTS records_deleted_at ON records (deleted_at);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _hash_key(file_hash):
+    return (file_hash or "").strip().lower()
+
+
+class WipeHistory:
+    """Append-only wipe history in SQLite, indexed by file hash and deletion time."""
+
+    def __init__(self, db_path=HISTORY_DB, legacy_path=HISTORY_FILE):
+        self.db_path = db_path
+        self.legacy_path = legacy_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            # The directory and database are only created on first use.
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._migrate_legacy()
+        return self._conn
+
+    def _migrate_legacy(self):
+        conn = self._conn
+        done = conn.execute("SELECT value FROM meta WHERE key = 'legacy_migrated'").fetchone()
+        if done or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
             history = json.load(f)
-    else:
-        history = []
+        with conn:
+            self._insert_many(history)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_migrated', ?)", (str(len(history)),))
+        print(f"[wipe_history] Migrated {len(history)} records from {self.legacy_path}")
+
+    def _insert_many(self, records):
+        self._conn.executemany(
+            "INSERT INTO records (hash_key, deleted_at, data) VALUES (?, ?, ?)",
+            ((_hash_key(r.get("file_hash")), r.get("deleted_at"), json.dumps(r)) for r in records),
+        )
+
+    def append(self, record):
+        self.extend([record])
+
+    def extend(self, records):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                self._insert_many(records)
+
+    def find_by_hash(self, file_hash):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT data FROM records WHERE hash_key = ? ORDER BY id", (_hash_key(file_hash),)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
 
-    history.append(record)
+    def between(self, start=None, end=None):
+        """Records with ``start <= deleted_at < end`` (ISO-8601 UTC strings)."""
+        query = "SELECT data FROM records WHERE 1 = 1"
+        params = []
+        if start is not None:
+            query += " AND deleted_at >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND deleted_at < ?"
+            params.append(end)
+        with self._lock:
+            rows = self._connection().execute(query + " ORDER BY deleted_at, id", params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def all(self):
+        with self._lock:
+            rows = self._connection().execute("SELECT data FROM records ORDER BY id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default = WipeHistory()
+
+
+def save_wipe_record(record):
+    _default.append(record)
 
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, indent=4)
 
 def load_wipe_history():
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+    return _default.all()
+
+
+def find_wipe_records(file_hash):
+    return _default.find_by_hash(file_hash)
+
+
+def wipe_records_between(start=None, end=None):
+    return _default.between(start, end)
@@ -1,26 +1,50 @@
 import os
 import subprocess
 
-def wipe_disk_nist_compliant(disk_device):
-    """Erase disk as per NIST SP 800-88 clear method (multi-pattern overwrite)"""
-    patterns = [
-        "/dev/urandom",               # random data
-        "/dev/zero",                  # zero fill
-        "/dev/urandom"                # random data again
-    ]
-    for idx, pattern in enumerate(patterns):
-        subprocess.run(
-            ["sudo", "dd", f"if={pattern}", f"of={disk_device}", "bs=1M", "status=progress"],
-            check=True
-        )
-        print(f"NIST erase pass {idx+1} complete.")
-    print(f"Disk wipe NIST SP 800-88 compliant complete for {disk_device}.")
+from src.extents import data_extents, extent_bytes, for_each_extent
+from src.metrics import WipeMetrics
+from src.offload import zero_extents
+from src.methods import file_method, get_method, pattern_for
+from src.overwrite import DEFAULT_CHUNK_SIZE, Overwriter
+from src.pipeline import hashing_pass
+from src.tree_wipe import DEFAULT_WORKERS as DEFAULT_TREE_WORKERS, wipe_tree
+from src.block_wipe import DEFAULT_BLOCK_SIZE, overwrite_target, refuse_in_use
+from src.checkpoint import CheckpointJournal, journal_path
+
+def wipe_disk_nist_compliant(disk_device, block_size=DEFAULT_BLOCK_SIZE, direct=False, progress=None,
+                             verify=False, metrics=None, offload=True, discard=False, resume=True,
+                             wipe_method="nist-clear", queue_depth=1):
+    """Erase disk as per NIST SP 800-88 clear method (multi-pattern overwrite)
+
+    Runs in-process (no dd), so it needs write access to ``disk_device``; image
+    files work the same way as block devices. With ``verify`` the final pass is
+    read back as it is written and False is returned on any mismatch. The zero
+    pass is offloaded to the kernel (BLKZEROOUT) unless ``offload`` is off, and
+    ``discard`` releases the whole device afterwards. With ``resume`` an
+    interrupted wipe of the same drive continues from its checkpoint journal.
+    ``wipe_method`` picks another registered method (see src.methods) or a
+    custom list of pass patterns; methods that require verification get it.
+    ``queue_depth`` above 1 keeps that many striped writes in flight.
+    """
+    method = get_method(wipe_method)
+    journal = CheckpointJournal(journal_path(disk_device)) if resume else None
+    stats = overwrite_target(disk_device, method.passes, block_size=block_size,
+                             direct=direct, progress=progress, verify=verify or method.verify,
+                             metrics=metrics, offload=offload, discard=discard, journal=journal,
+                             queue_depth=queue_depth)
+    if not stats.get("verification", {}).get("passed", True):
+        print(f"Verification failed for {disk_device}: {stats['verification']['mismatches']}")
+        return False
+    print(f"Disk wipe ({method.name}) complete for {disk_device}.")
     return True
 
-def secure_erase_ssd_nist(disk_device):
+def secure_erase_ssd_nist(disk_device, metrics=None):
     # Same as secure_erase_ssd but ensure you check SSD specs and use correct passwords on all drives
     import subprocess
     try:
+        refuse_in_use(disk_device)
+        if metrics:
+            metrics.begin_pass("secure-erase")
         # Setup user password for security erase
         subprocess.run(
             ["sudo", "hdparm", "--user-master", "u", "--security-set-pass", "ByteShift", disk_device],
@@ -32,87 +56,225 @@ def secure_erase_ssd_nist(disk_device):
             check=True
         )
         print(f"SSD Secure erase (NIST compliant) done for {disk_device}")
+        if metrics:
+            # The drive erases itself, so there is no byte count to report.
+            metrics.end_pass(None, mechanism="hdparm-security-erase")
         return True
     except Exception as e:
+        if metrics:
+            metrics.error(e)
         print(f"Error during SSD secure erase: {e}")
         return False
     
-def wipe_file(file_path, passes=3):
-    # Same as your previous logic for multi-pass wipe
-    if not os.path.isfile(file_path):
-        print(f"File not found: {file_path}")
-        return False
+def _verification(pass_number, bytes_checked, mismatches):
+    return {
+        "mode": "full",
+        "pass": pass_number,
+        "bytes_checked": bytes_checked,
+        "mismatches": mismatches,
+        "passed": not mismatches,
+    }
+
+
+def _overwrite_file(file_path, passes, chunk_size, compute_hash, verify, progress=None, metrics=None,
+                    offload=True, wipe_method=None):
+    """Overwrite ``passes`` random passes plus a zero pass, then delete the file.
+
+    A ``wipe_method`` (registered name or list of pass patterns) replaces
+    that default sequence; the method used is returned under ``wipe_method``.
+
+    When ``compute_hash`` is set the first pass also reads and hashes the
+    original contents. With ``verify`` the final pass is read back (as it is
+    written, or right after when it was also the hashing pass), and the file
+    is kept if any range fails to match.
+    Only allocated extents are overwritten, so holes in sparse files stay
+    holes; the extent map is returned under ``extents``. With ``offload`` a
+    zero pass is left to the kernel (fallocate) where the filesystem allows,
+    but only after an earlier pass has overwritten the extents in place:
+    fallocate only marks blocks unwritten (or frees them), so a first or only
+    zero pass would leave the original data on the medium.
+    ``progress(pass_index, bytes_done, total_bytes)`` is called per chunk.
+    Per-pass I/O metrics are returned under ``metrics``.
+    """
+    metrics = metrics or WipeMetrics(file_path, "file")
     file_size = os.path.getsize(file_path)
+    method = get_method(wipe_method) if wipe_method else file_method(passes)
+    verify = verify or method.verify
+    patterns = [pattern_for(spec) for spec in method.passes]
+    result = {"file_hash": None, "size": file_size, "passes": len(patterns),
+              "wipe_method": {"name": method.name, "passes": list(method.passes)}}
+    overwriter = Overwriter(chunk_size, metrics)
+    fd = os.open(file_path, os.O_RDWR | getattr(os, "O_BINARY", 0))
     try:
-        with open(file_path, "r+b") as f:
-            for p in range(passes):
-                f.seek(0)
-                f.write(os.urandom(file_size))
-                f.flush()
-                os.fsync(f.fileno())
-        with open(file_path, "r+b") as f:
-            f.seek(0)
-            f.write(b"\x00" * file_size)
-            f.flush()
-            os.fsync(f.fileno())
+        extents = data_extents(fd, file_size)
+        allocated = extent_bytes(extents)
+        result["extents"] = {
+            "size": file_size,
+            "allocated": allocated,
+            "map": [[start, end] for start, end in extents],
+        }
+        for idx, pattern in enumerate(patterns):
+            report = None
+            if progress:
+                report = lambda done, total, idx=idx: progress(idx, done, total)
+            metrics.begin_pass(pattern.name)
+            verify_pass = verify and idx == len(patterns) - 1
+            mechanism = None
+            # Pass 0 is always written, so any later pass may be offloaded.
+            if offload and pattern.name == "zero" and idx > 0:
+                mechanism = zero_extents(fd, extents, report)
+            if mechanism:
+                pass
+            elif idx == 0 and compute_hash:
+                result["file_hash"] = hashing_pass(fd, file_size, overwriter, pattern, progress=report,
+                                                   extents=extents)
+                if verify_pass:
+                    # The only pass was also the hashing one: check it below.
+                    overwriter.sync(fd)
+            elif verify_pass:
+                from src.verify import merge_ranges, verified_pass
+                mismatches = for_each_extent(
+                    extents, lambda offset, length, rep: verified_pass(overwriter, fd, pattern, length,
+                                                                       offset, progress=rep), report)
+                mismatches = merge_ranges(r for ranges in mismatches for r in ranges)
+                result["verification"] = _verification(idx + 1, allocated, mismatches)
+            else:
+                for_each_extent(extents, lambda offset, length, rep: overwriter.run_pass(
+                    fd, pattern, length, offset, progress=rep), report)
+            if verify_pass and "verification" not in result:
+                # Written by the kernel or the hashing pass: read it all back.
+                from src.verify import check_written, merge_ranges
+                mismatches = merge_ranges(r for start, end in extents
+                                          for r in check_written(fd, pattern, start, end - start))
+                result["verification"] = _verification(idx + 1, allocated, mismatches)
+            overwriter.sync(fd)
+            metrics.end_pass(allocated, mechanism or "write")
+    finally:
+        os.close(fd)
+        overwriter.close()
+    if "verification" in result:
+        metrics.verified(result["verification"])
+    result["metrics"] = metrics.as_dict()
+    result["deleted"] = result.get("verification", {}).get("passed", True)
+    if result["deleted"]:
         os.remove(file_path)
-        print(f"File securely wiped and deleted: {file_path}")
-        return True
+    return result
+
+
+def wipe_file_detailed(file_path, passes=3, chunk_size=DEFAULT_CHUNK_SIZE, compute_hash=True, verify=False,
+                       progress=None, metrics=None, offload=True, wipe_method=None):
+    """Wipe a file and return details for its report, or None if the wipe failed.
+
+    The dict carries ``file_hash`` (hashed during the first pass when
+    ``compute_hash`` is set), ``deleted`` and, with ``verify``, the
+    ``verification`` results of the read-back final pass, and the per-pass
+    I/O ``metrics`` (recorded on ``metrics`` if a WipeMetrics is given).
+    ``offload=False`` writes the zero pass even where the kernel could zero it.
+    ``wipe_method`` selects a registered method (e.g. ``"dod"``, ``"gutmann"``)
+    or a custom list of pass patterns instead of ``passes`` random + zero.
+    """
+    if not os.path.isfile(file_path):
+        print(f"File not found: {file_path}")
+        return None
+    try:
+        result = _overwrite_file(file_path, passes, chunk_size, compute_hash, verify, progress, metrics,
+                                 offload, wipe_method)
+        if result["deleted"]:
+            print(f"File securely wiped and deleted: {file_path}")
+        else:
+            print(f"Verification failed, file kept: {file_path} "
+                  f"{result['verification']['mismatches']}")
+        return result
     except Exception as e:
         print(f"Error wiping file: {e}")
-        return False
+        if metrics:
+            metrics.error(e)
+        return None
+
+
+def wipe_file(file_path, passes=3, chunk_size=DEFAULT_CHUNK_SIZE, verify=False):
+    """Overwrite a file with random passes and a final zero pass, then delete it.
+
+    Data is streamed through a single ``chunk_size`` buffer, so memory use does
+    not grow with the file size.
+    """
+    result = wipe_file_detailed(file_path, passes, chunk_size, compute_hash=False, verify=verify)
+    return bool(result and result["deleted"])
+
 
-def wipe_partition(partition_path):
+def hash_and_wipe_file(file_path, passes=3, chunk_size=DEFAULT_CHUNK_SIZE, verify=False):
+    """Wipe a file like wipe_file, hashing its original contents in the same read.
+
+    Returns the SHA-256 hex digest of the file before it was wiped, or None if
+    the wipe failed.
+    """
+    result = wipe_file_detailed(file_path, passes, chunk_size, compute_hash=True, verify=verify)
+    if result and result["deleted"]:
+        return result["file_hash"]
+    return None
+
+
+def wipe_partition(partition_path, passes=1, workers=DEFAULT_TREE_WORKERS, overwrite=True, progress=None,
+                   metrics=None):
+    """Overwrite and delete every file below ``partition_path`` in parallel.
+
+    The whole tree is recorded on ``metrics`` as a single pass.
+    """
     try:
-        print(f"[wipe_utils] Simulating wiping partition: {partition_path}")
-        for root, dirs, files in os.walk(partition_path, topdown=False):
-            for name in files:
-                os.remove(os.path.join(root, name))
-            for name in dirs:
-                os.rmdir(os.path.join(root, name))
-        return True
+        print(f"[wipe_utils] Wiping directory tree: {partition_path}")
+        if metrics:
+            metrics.begin_pass("tree")
+        stats = wipe_tree(partition_path, passes=passes, workers=workers, overwrite=overwrite,
+                          progress=progress)
+        if metrics:
+            metrics.end_pass(stats["bytes_written"])
+            for error in stats["errors"]:
+                metrics.error(error)
+        print(f"[wipe_utils] Wiped {stats['files']} files and {stats['dirs']} directories "
+              f"({stats['hardlinks_deduplicated']} duplicate hard links skipped)")
+        for error in stats["errors"]:
+            print(f"[wipe_utils] {error}")
+        return not stats["errors"]
     except Exception as e:
         print(f"[wipe_utils] Partition wipe failed: {e}")
+        if metrics:
+            metrics.error(e)
         return False
 
 
-def wipe_os(disk_device="/dev/sda"):
+def wipe_os(disk_device="/dev/sda", block_size=DEFAULT_BLOCK_SIZE, direct=False, progress=None,
+            verify=False, metrics=None, offload=True, discard=False, resume=True,
+            wipe_method="nist-clear", queue_depth=1):
     """
     Perform a NIST SP 800-88 compliant full wipe (Clear) on the OS disk.
 
     WARNING: This destroys ALL data on the specified disk irreversibly.
     Make sure this is run ONLY from a live boot environment outside the target disk OS.
+    An interrupted wipe resumes from its checkpoint journal unless ``resume`` is off.
     """
     try:
         print(f"[wipe_os] Starting full disk wipe on {disk_device} ...")
 
         # NIST SP 800-88 Clear method with 3 passes: random, zeros, random.
-        passes = [
-            "/dev/urandom",
-            "/dev/zero",
-            "/dev/urandom"
-        ]
-
-        for idx, pattern in enumerate(passes):
-            print(f"[wipe_os] Starting pass {idx+1} with pattern {pattern} ...")
-            # Use dd to overwrite disk
-            subprocess.run(
-                [
-                    "dd",
-                    f"if={pattern}",
-                    f"of={disk_device}",
-                    "bs=1M",
-                    "status=progress",
-                    "conv=fsync"
-                ],
-                check=True
-            )
-            print(f"[wipe_os] Pass {idx+1} complete.")
+        method = get_method(wipe_method)
+        journal = CheckpointJournal(journal_path(disk_device)) if resume else None
+        stats = overwrite_target(disk_device, method.passes, block_size=block_size,
+                                 direct=direct, progress=progress, verify=verify or method.verify,
+                                 metrics=metrics, offload=offload, discard=discard, journal=journal,
+                                 queue_depth=queue_depth)
+        if not stats.get("verification", {}).get("passed", True):
+            print(f"[wipe_os] Verification failed: {stats['verification']['mismatches']}")
+            return False
 
         print(f"[wipe_os] Full disk wipe complete for {disk_device}.")
         return True
 
-    except subprocess.CalledProcessError as e:
+    except ValueError as e:
+        # A refused disk (mounted, in use, the running system) or a bad method.
+        print(f"[wipe_os] {e}")
+        return False
+
+    except OSError as e:
         print(f"[wipe_os] Error during disk wipe: {e}")
         return False
 
@@ -6,14 +6,20 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 
-from src.wipe_engine import wipe_file, wipe_partition, wipe_os
-from src.reports import generate_report
+from src.jobs import CANCELLED, DONE, RUNNING
+from src.reports import new_report_id, report_details, report_paths
+from src.report_queue import ReportQueue
 from src.wipe_history import save_wipe_record
+from wipe_jobs import QtJobEngine, format_bytes, format_eta
 
 class HomePage(QWidget):
     def __init__(self):
         super().__init__()
         self.file_hash = ""
+        self.report_queue = None
+        self.jobs = QtJobEngine(parent=self)
+        self.jobs.job_updated.connect(self.on_job_updated)
+        self.jobs.job_finished.connect(self.on_job_finished)
 
         self.setStyleSheet("""
             QWidget {
@@ -77,6 +83,12 @@ class HomePage(QWidget):
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         layout.addWidget(self.progress_bar)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.setFixedHeight(30)
+        self.cancel_btn.clicked.connect(self.cancel_jobs)
+        layout.addWidget(self.cancel_btn, alignment=Qt.AlignHCenter)
         
         # BIG BUTTONS WITH ICONS/EMOJIS
         self.select_files_btn = QPushButton("🗑️  Wipe a Specific File")
@@ -94,6 +106,18 @@ class HomePage(QWidget):
         self.wipe_os_btn.clicked.connect(self.confirm_and_wipe_os)
         layout.addWidget(self.wipe_os_btn, alignment=Qt.AlignHCenter)
 
+    def get_report_queue(self):
+        if self.report_queue is None:
+            BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+            private_key_path = os.path.join(BASE_DIR, 'keys', 'private.pem')
+            self.report_queue = ReportQueue(private_key_path)
+        return self.report_queue
+
+    def report_finished(self, future):
+        # Called on a pool thread; only log here, never touch widgets.
+        if future.exception() is not None:
+            print(f"[home_page] Report generation failed: {future.exception()}")
+
     def copy_hash_to_clipboard(self):
         QApplication.clipboard().setText(self.hash_display.text())
         QMessageBox.information(self, "Copied", "File hash copied to clipboard.")
@@ -101,81 +125,110 @@ class HomePage(QWidget):
     def select_and_wipe_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select File to Wipe")
         if file_path:
-            self.status_panel.setText("Computing file hash...")
-            QApplication.processEvents()
-            file_hash = self.compute_file_hash(file_path)
-            self.hash_display.setText(file_hash)
-            self.hash_display.setVisible(True)
             self.copy_hash_btn.setVisible(False)
-            self.status_panel.setText("Hash ready. Starting wipe...")
-            QApplication.processEvents()
-
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setRange(0, 0)
-
-            success = wipe_file(file_path)
-            self.progress_bar.setVisible(False)
-
-            if success:
-                BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-                private_key_path = os.path.join(BASE_DIR, 'keys', 'private.pem')
-                public_key_path = os.path.join(BASE_DIR, 'keys', 'public.pem')
-                json_report, pdf_report = generate_report(
-                    file_path=file_path,
-                    file_hash=file_hash,
-                    private_key_path=private_key_path,
-                    public_key_path=public_key_path
-                )
-
-                record = {
-                    "file_name": os.path.basename(file_path),
-                    "file_hash": file_hash,
-                    "deleted_at": datetime.datetime.utcnow().isoformat() + "Z",
-                    "json_report_path": json_report,
-                    "pdf_report_path": pdf_report
-                }
-                save_wipe_record(record)
-
-                self.file_hash = file_hash
-                self.copy_hash_btn.setVisible(True)
-                QMessageBox.information(self, "Success", (f"File wiped:\n{file_path}\n\nReports generated:\n{json_report}\n{pdf_report}\n\nHash copied above."))
-                self.status_panel.setText("File wiped and reports generated. Copy hash and go to Verify.")
-            else:
-                QMessageBox.warning(self, "Error", f"Could not wipe:\n{file_path}")
-                self.status_panel.setText("Wipe failed. Try again.")
+            # The SHA-256 is computed during the first overwrite pass, so the
+            # file is only read once; the final pass is read back as it is written.
+            self.start_job("file", file_path, verify=True)
 
     def select_and_wipe_partition(self):
         partition_path = QFileDialog.getExistingDirectory(self, "Select Partition to Wipe")
         if partition_path:
-            self.status_panel.setText("Wiping partition...")
-            QApplication.processEvents()
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setRange(0, 0)
-            success = wipe_partition(partition_path)
-            self.progress_bar.setVisible(False)
-            if success:
-                QMessageBox.information(self, "Success", f"Partition wiped:\n{partition_path}")
-                self.status_panel.setText("Partition wiped successfully.")
-            else:
-                QMessageBox.warning(self, "Error", f"Could not wipe partition:\n{partition_path}")
-                self.status_panel.setText("Partition wipe failed.")
+            self.start_job("partition", partition_path)
 
     def confirm_and_wipe_os(self):
         reply = QMessageBox.warning(self, "Confirm OS Wipe", "This will erase the entire Operating System and all data. This action is irreversible.\nProceed?", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.status_panel.setText("Wiping entire OS...")
-            QApplication.processEvents()
-            self.progress_bar.setVisible(True)
+            self.start_job("os")
+
+    def start_job(self, kind, target=None, **options):
+        job = self.jobs.submit(kind, target, **options)
+        self.progress_bar.setVisible(True)
+        self.cancel_btn.setVisible(True)
+        queued = len(self.jobs.active()) - 1
+        label = target or "entire OS disk"
+        self.status_panel.setText(f"Queued wipe of {label}" + (f" ({queued} ahead)" if queued else "") + "...")
+        return job
+
+    def cancel_jobs(self):
+        self.jobs.cancel_all()
+        self.status_panel.setText("Cancelling...")
+
+    def on_job_updated(self, job):
+        if job.status != RUNNING:
+            return
+        if job.total_bytes:
+            self.progress_bar.setRange(0, 1000)
+            self.progress_bar.setValue(int(job.bytes_done * 1000 / job.total_bytes))
+            progress = f"{format_bytes(job.bytes_done)} / {format_bytes(job.total_bytes)}"
+        else:
             self.progress_bar.setRange(0, 0)
-            success = wipe_os()
+            progress = f"{job.files_done} files, {format_bytes(job.bytes_done)} written"
+        passes = f"Pass {job.pass_index + 1}/{job.passes} - " if job.passes else ""
+        queued = len(self.jobs.active()) - 1
+        self.status_panel.setText(
+            f"Wiping {job.target or 'OS disk'}\n{passes}{progress} - "
+            f"{format_bytes(job.throughput)}/s - ETA {format_eta(job.eta)}"
+            + (f"\n{queued} more job(s) queued" if queued else "")
+        )
+
+    def on_job_finished(self, job):
+        if not self.jobs.active():
             self.progress_bar.setVisible(False)
-            if success:
+            self.cancel_btn.setVisible(False)
+        if job.status == CANCELLED:
+            self.status_panel.setText(f"Wipe cancelled: {job.target or 'OS disk'}")
+        elif job.kind == "file":
+            self.file_wipe_finished(job)
+        elif job.kind == "partition":
+            if job.status == DONE:
+                QMessageBox.information(self, "Success", f"Partition wiped:\n{job.target}")
+                self.status_panel.setText("Partition wiped successfully.")
+            else:
+                QMessageBox.warning(self, "Error", f"Could not wipe partition:\n{job.target}")
+                self.status_panel.setText("Partition wipe failed.")
+        elif job.kind == "os":
+            if job.status == DONE:
                 QMessageBox.information(self, "Success", "Operating system wiped successfully.")
                 self.status_panel.setText("OS wipe completed.")
             else:
                 QMessageBox.warning(self, "Error", "Failed to wipe the OS.")
                 self.status_panel.setText("OS wipe failed.")
 
+    def file_wipe_finished(self, job):
+        file_path = job.target
+        result = job.result
+        if job.status == DONE:
+            file_hash = result["file_hash"]
+            self.hash_display.setText(file_hash)
+            self.hash_display.setVisible(True)
+            # Signing and PDF rendering run on the report queue's worker
+            # processes; the paths are known up front.
+            report_id = new_report_id()
+            future = self.get_report_queue().submit(file_path, file_hash, details=report_details(result),
+                                                    report_id=report_id)
+            future.add_done_callback(self.report_finished)
+            json_report, pdf_report = report_paths(os.path.basename(file_path), report_id)
+
+            record = {
+                "file_name": os.path.basename(file_path),
+                "file_hash": file_hash,
+                "deleted_at": datetime.datetime.utcnow().isoformat() + "Z",
+                "json_report_path": json_report,
+                "pdf_report_path": pdf_report
+            }
+            save_wipe_record(record)
+
+            self.file_hash = file_hash
+            self.copy_hash_btn.setVisible(True)
+            QMessageBox.information(self, "Success", (f"File wiped:\n{file_path}\n\nReports being generated:\n{json_report}\n{pdf_report}\n\nHash copied above."))
+            self.status_panel.setText("File wiped, reports are being generated. Copy hash and go to Verify.")
+        elif result:
+            QMessageBox.warning(self, "Verification Failed", f"Read-back verification found mismatches, file was kept:\n{file_path}")
+            self.status_panel.setText("Wipe verification failed. Try again.")
+        else:
+            QMessageBox.warning(self, "Error", f"Could not wipe:\n{file_path}")
+            self.status_panel.setText("Wipe failed. Try again.")
+
     def compute_file_hash(self, file_path):
         import hashlib
         sha = hashlib.sha256()
@@ -7,8 +7,6 @@ from PySide6.QtCore import Qt
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from home_page import HomePage
-from verify_page import VerifyPage
-from settings_page import SettingsPage
 from navigation import NavigationBar
 
 class MainWindow(QMainWindow):
@@ -20,14 +18,12 @@ class MainWindow(QMainWindow):
         self.stack = QStackedWidget()
         self.setCentralWidget(self.stack)
 
-        # Pages
+        # Pages: only Home is built at startup, the others on first visit
         self.home_page = HomePage()
-        self.verify_page = VerifyPage()
-        self.settings_page = SettingsPage()
+        self.verify_page = None
+        self.settings_page = None
 
-        self.stack.addWidget(self.home_page)      # 0
-        self.stack.addWidget(self.verify_page)    # 1
-        self.stack.addWidget(self.settings_page)  # 2
+        self.stack.addWidget(self.home_page)
 
         self.nav_widget = NavigationBar()
         self.nav = QToolBar()
@@ -35,15 +31,34 @@ class MainWindow(QMainWindow):
         self.nav.addWidget(self.nav_widget)
         self.addToolBar(Qt.BottomToolBarArea, self.nav)
 
-        self.nav_widget.home_clicked.connect(lambda: self.stack.setCurrentIndex(0))
+        self.nav_widget.home_clicked.connect(lambda: self.stack.setCurrentWidget(self.home_page))
         self.nav_widget.verify_clicked.connect(self.go_to_verify)
-        self.nav_widget.settings_clicked.connect(lambda: self.stack.setCurrentIndex(2))
+        self.nav_widget.settings_clicked.connect(self.go_to_settings)
 
     def go_to_verify(self):
+        if self.verify_page is None:
+            from verify_page import VerifyPage
+            self.verify_page = VerifyPage()
+            self.stack.addWidget(self.verify_page)
         # Pass hash from home page to verify page (if exists)
         hash_value = getattr(self.home_page, "file_hash", "")
         self.verify_page.set_verification_hash(hash_value)
-        self.stack.setCurrentIndex(1)
+        self.stack.setCurrentWidget(self.verify_page)
+
+    def go_to_settings(self):
+        if self.settings_page is None:
+            from settings_page import SettingsPage
+            self.settings_page = SettingsPage()
+            self.stack.addWidget(self.settings_page)
+        self.stack.setCurrentWidget(self.settings_page)
+
+    def closeEvent(self, event):
+        # Stop running wipes at the next chunk, then let queued reports finish
+        self.home_page.jobs.cancel_all()
+        self.home_page.jobs.shutdown()
+        if self.home_page.report_queue is not None:
+            self.home_page.report_queue.close()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
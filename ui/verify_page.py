@@ -3,9 +3,8 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 import datetime
-import pytz
 
-from src.wipe_history import load_wipe_history
+from src.wipe_history import find_wipe_records
 
 class VerifyPage(QWidget):
     def __init__(self):
@@ -85,20 +84,20 @@ class VerifyPage(QWidget):
             QMessageBox.warning(self, "Input Required", "Please enter a hash to verify.")
             return
 
-        history = load_wipe_history()
-        for record in history:
-            record_hash = record.get("file_hash", "").strip().lower()
-            if record_hash == input_hash:
-                try:
-                    utc_dt = datetime.datetime.fromisoformat(record.get("deleted_at").replace("Z", "+00:00"))
-                    ist_tz = pytz.timezone("Asia/Kolkata")
-                    ist_dt = utc_dt.astimezone(ist_tz)
-                    ist_str = ist_dt.strftime("%Y-%m-%d %H:%M:%S %Z")
-                except Exception:
-                    ist_str = record.get("deleted_at")
-
-                self.show_message(f"✅ Hash Verified!\nFile: {record.get('file_name')}\nDeleted At (IST): {ist_str}", error=False)
-                return
+        records = find_wipe_records(input_hash)
+        if records:
+            record = records[0]
+            try:
+                utc_dt = datetime.datetime.fromisoformat(record.get("deleted_at").replace("Z", "+00:00"))
+                import pytz  # only needed once a hash matches
+                ist_tz = pytz.timezone("Asia/Kolkata")
+                ist_dt = utc_dt.astimezone(ist_tz)
+                ist_str = ist_dt.strftime("%Y-%m-%d %H:%M:%S %Z")
+            except Exception:
+                ist_str = record.get("deleted_at")
+
+            self.show_message(f"✅ Hash Verified!\nFile: {record.get('file_name')}\nDeleted At (IST): {ist_str}", error=False)
+            return
 
         self.show_message("❌ Verification Failed! Hash not found in wipe history.", error=True)
 
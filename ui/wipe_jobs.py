@@ -0,0 +1,42 @@
+from PySide6.QtCore import QObject, Signal
+
+from src.jobs import JobEngine
+
+
+class QtJobEngine(QObject):
+    """Qt front for JobEngine: worker-thread callbacks become queued signals,
+    so slots connected from widgets always run on the GUI thread."""
+
+    job_updated = Signal(object)
+    job_finished = Signal(object)
+
+    def __init__(self, workers=1, parent=None):
+        super().__init__(parent)
+        self.engine = JobEngine(workers, on_update=self.job_updated.emit, on_finished=self.job_finished.emit)
+
+    def submit(self, kind, target=None, **options):
+        return self.engine.submit(kind, target, **options)
+
+    def cancel_all(self):
+        self.engine.cancel_all()
+
+    def active(self):
+        return self.engine.active()
+
+    def shutdown(self, wait=True):
+        self.engine.shutdown(wait)
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if count < 1000 or unit == "TB":
+            return f"{count:.1f} {unit}"
+        count /= 1000
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"